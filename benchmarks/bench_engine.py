@@ -0,0 +1,360 @@
+"""Times the hot functions of the engine across board sizes and densities,
+with fixed seeds, and compares the results with a stored baseline.
+
+    python benchmarks/bench_engine.py --sizes 8 64 256 1000 --output results.json
+    python benchmarks/bench_engine.py --sizes 8 64 256 1000 --baseline results.json
+
+With --baseline, the median of every case is compared with the baseline and
+the script exits with status 1 if any case is slower than the threshold.
+
+With --source, the engine is imported from another checkout, so a change
+can be timed before and after it is made. Only the public methods of the
+engine are used, and the cases an older engine does not have are skipped:
+
+    git worktree add --detach /tmp/before HEAD~1
+    python benchmarks/bench_engine.py --sizes 8 64 128 --source /tmp/before/minesweeper --output before.json
+    python benchmarks/bench_engine.py --sizes 8 64 128 --baseline before.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+from time import perf_counter
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'minesweeper')
+
+BACKEND_CLASSES = {'game': ('engine', 'Game'), 'bitboard': ('bitboard', 'BitboardGame')}
+
+
+def load_backends(source):
+    """Imports the engine classes that exist in a checkout.
+
+    Parameters
+    ----------
+    source : str
+        The directory holding the modules of the engine
+
+    Returns
+    ----------
+    dict
+        A dict mapping the name of every backend found to its class
+    """
+
+    sys.path.insert(0, source)
+    backends = {}
+    for backend, (module_name, class_name) in BACKEND_CLASSES.items():
+        try:
+            backends[backend] = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            continue
+    return backends
+
+
+def get_bomb_coords(game):
+    """Returns the coordinates of the bombs of a game, which older engines
+    keep as tuples and newer ones as positions.
+
+    Parameters
+    ----------
+    game : Game
+        A game whose bombs were generated
+
+    Returns
+    ----------
+    list
+        A list of tuples representing coordinates of the bombs
+    """
+
+    return [bomb if isinstance(bomb, tuple) else divmod(bomb, game.columns) for bomb in game.bombs]
+
+
+def create_game(game_class, size, density, seed):
+    """Creates a started game with some flags placed and no square opened.
+
+    Parameters
+    ----------
+    game_class : type
+        The engine class
+    size : int
+        The number of rows and columns of the board
+    density : float
+        The fraction of the squares that hold a bomb
+    seed : int
+        The seed of the game
+
+    Returns
+    ----------
+    Game
+        The game, with its bombs and numbers generated
+    """
+
+    number_of_bombs = max(1, int(size * size * density))
+    try:
+        game = game_class(size, size, number_of_bombs, seed=seed)
+    except TypeError:
+        random.seed(seed)
+        game = game_class(size, size, number_of_bombs)
+    game.generate_bombs((size // 2, size // 2))
+    game.generate_numbers()
+    for bomb in get_bomb_coords(game)[::2]:
+        game.place_or_erase_flag_on_square(bomb)
+    return game
+
+
+def get_cases(game, seed):
+    """Builds the timed cases of a game. Every case is a pair of a setup
+    function, run before each measurement and not timed, and of the timed
+    function, given the result of the setup.
+
+    Parameters
+    ----------
+    game : Game
+        A game created by create_game
+    seed : int
+        The seed the game was created with
+
+    Returns
+    ----------
+    dict
+        A dict mapping the name of every case to its setup and timed
+        functions
+    """
+
+    middle_coords = (game.rows // 2, game.columns // 2)
+    terrain = game.get_adjacent_empty_terrain(middle_coords)
+
+    def reset_layout():
+        # Older engines draw the bombs from the global generator, which is
+        # seeded again so that every run generates the same bombs.
+        game.layout = None
+        random.seed(seed)
+
+    def reset_states():
+        game.init_matrix_state()
+        game.zero_regions = []
+        game.zero_region_labels = {}
+        for bomb in get_bomb_coords(game)[::2]:
+            game.place_or_erase_flag_on_square(bomb)
+
+    def nothing():
+        return None
+
+    return {
+        'generate_bombs': (reset_layout, lambda _: game.generate_bombs(middle_coords)),
+        'generate_numbers': (nothing, lambda _: game.generate_numbers()),
+        'get_adjacent_empty_terrain': (nothing, lambda _: game.get_adjacent_empty_terrain(middle_coords)),
+        'get_adjacent_numbers': (nothing, lambda _: game.get_adjacent_numbers(terrain)),
+        'clear_terrain': (reset_states, lambda _: game.clear_terrain(middle_coords)),
+        'count_flags': (nothing, lambda _: game.count_flags()),
+        'is_game_completed': (nothing, lambda _: game.is_game_completed()),
+    }
+
+
+def measure(setup, function, repeats, warmup):
+    """Times a function several times after some untimed warmup runs.
+
+    Parameters
+    ----------
+    setup : callable
+        Run before every call of the function, not timed
+    function : callable
+        The timed function, given the result of the setup
+    repeats : int
+        The number of timed runs
+    warmup : int
+        The number of untimed runs before the timed ones
+
+    Returns
+    ----------
+    dict
+        The minimum, median, mean and standard deviation of the runs, in
+        seconds, and the number of runs
+    """
+
+    times = []
+    for run in range(warmup + repeats):
+        argument = setup()
+        start_time = perf_counter()
+        function(argument)
+        elapsed_time = perf_counter() - start_time
+        if run >= warmup:
+            times.append(elapsed_time)
+
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times),
+            'stdev': statistics.stdev(times) if len(times) > 1 else 0.0, 'repeats': len(times)}
+
+
+def run(backends, sizes, densities, functions, repeats, warmup, seed):
+    """Runs every case for every backend, size and density.
+
+    Parameters
+    ----------
+    backends : dict
+        A dict mapping the names of the backends to their classes
+    sizes : list
+        The numbers of rows and columns of the boards
+    densities : list
+        The fractions of the squares that hold a bomb
+    functions : list
+        The names of the cases to run, or None for all of them
+    repeats : int
+        The number of timed runs of every case
+    warmup : int
+        The number of untimed runs before the timed ones
+    seed : int
+        The seed of every game
+
+    Returns
+    ----------
+    list
+        A list of dicts, one per case, with its parameters and timings
+    """
+
+    results = []
+    for backend, game_class in backends.items():
+        for size in sizes:
+            for density in densities:
+                game = create_game(game_class, size, density, seed)
+                for name, (setup, function) in get_cases(game, seed).items():
+                    if functions and name not in functions or not hasattr(game, name):
+                        continue
+                    result = {'backend': backend, 'function': name, 'size': size, 'density': density}
+                    result.update(measure(setup, function, repeats, warmup))
+                    results.append(result)
+                    print(f'{backend:>8} {name:>27} {size:>5} {density:>5.2f} {result["median"] * 1000:>12.4f} ms '
+                          f'(min {result["min"] * 1000:.4f}, stdev {result["stdev"] * 1000:.4f})')
+    return results
+
+
+def get_case_key(result):
+    """Returns the key identifying the case of a result.
+
+    Parameters
+    ----------
+    result : dict
+        A result returned by run
+
+    Returns
+    ----------
+    tuple
+        The backend, the function, the size and the density of the case
+    """
+
+    return result['backend'], result['function'], result['size'], result['density']
+
+
+def get_ratios(results, baseline_results):
+    """Divides the medians of the results by those of a baseline.
+
+    Parameters
+    ----------
+    results : list
+        The results returned by run
+    baseline_results : list
+        The results of the baseline
+
+    Returns
+    ----------
+    list
+        A list of tuples of the key of every case found in both and its
+        ratio
+    """
+
+    baseline = {get_case_key(result): result for result in baseline_results}
+    ratios = []
+    for result in results:
+        baseline_result = baseline.get(get_case_key(result))
+        if baseline_result is None or baseline_result['median'] == 0:
+            continue
+        ratios.append((get_case_key(result), result['median'] / baseline_result['median']))
+    return ratios
+
+
+def compare(results, baseline_results, threshold):
+    """Compares the medians of the results with those of a baseline.
+
+    Parameters
+    ----------
+    results : list
+        The results returned by run
+    baseline_results : list
+        The results of the baseline
+    threshold : float
+        The ratio of the medians above which a case is a regression
+
+    Returns
+    ----------
+    list
+        A list of tuples of the key of every regressed case and its ratio
+    """
+
+    return [(key, ratio) for key, ratio in get_ratios(results, baseline_results) if ratio > threshold]
+
+
+def main(arguments):
+    """Runs the benchmark from the command line.
+
+    Parameters
+    ----------
+    arguments : list
+        The command line arguments
+
+    Returns
+    ----------
+    int
+        The exit status, 1 if a regression was found
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['game'], choices=list(BACKEND_CLASSES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 64, 256, 1000, 2000])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.2])
+    parser.add_argument('--functions', nargs='+', help='only run these functions')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare the results with this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio of the median above which a case is a regression')
+    parser.add_argument('--source', default=SOURCE, help='directory of the engine modules to time')
+    options = parser.parse_args(arguments)
+
+    available_backends = load_backends(options.source)
+    backends = {}
+    for backend in options.backends:
+        if backend in available_backends:
+            backends[backend] = available_backends[backend]
+        else:
+            print(f'skipping {backend}, not found in {options.source}')
+
+    results = run(backends, options.sizes, options.densities, options.functions, options.repeats,
+                  options.warmup, options.seed)
+
+    if options.output:
+        report = {'python': platform.python_version(), 'platform': platform.platform(), 'seed': options.seed,
+                  'repeats': options.repeats, 'warmup': options.warmup, 'results': results}
+        with open(options.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline_results = json.load(file)['results']
+        for (backend, function, size, density), ratio in get_ratios(results, baseline_results):
+            print(f'{backend:>8} {function:>27} {size:>5} {density:>5.2f} {ratio:>8.2f}x the baseline time')
+        regressions = compare(results, baseline_results, options.threshold)
+        for (backend, function, size, density), ratio in regressions:
+            print(f'REGRESSION {backend} {function} {size}x{size} density {density}: {ratio:.2f}x slower')
+        if regressions:
+            return 1
+        print('no regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,80 @@
+"""Measures how many attempts and how much time the no-guess mode needs to
+generate boards of several sizes and bomb counts.
+
+    python benchmarks/bench_no_guess.py --boards 9x9x10 16x16x40 16x30x99
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'minesweeper'))
+
+from noguess import NoGuessGame  # noqa: E402
+
+
+def bench(rows, columns, number_of_bombs, number_of_boards, seed):
+    """Generates several no-guess boards.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the boards
+    columns : int
+        The number of columns of the boards
+    number_of_bombs : int
+        The number of bombs of the boards
+    number_of_boards : int
+        The number of boards that are generated
+    seed : int
+        The seed of the first board; the next boards use the following seeds
+
+    Returns
+    ----------
+    dict
+        The number of boards, the fraction that can be won without guessing,
+        the mean and the maximum number of attempts, and the mean and the
+        maximum generation time in milliseconds
+    """
+
+    attempts = []
+    times = []
+    solvable = 0
+    for i in range(number_of_boards):
+        game = NoGuessGame(rows, columns, number_of_bombs, seed=seed + i)
+        game.start_round((rows // 2, columns // 2))
+        attempts.append(game.generation_attempts)
+        times.append(game.generation_time * 1000)
+        solvable += game.solvable
+
+    return {'boards': number_of_boards, 'solvable': solvable / number_of_boards,
+            'mean_attempts': sum(attempts) / len(attempts), 'max_attempts': max(attempts),
+            'mean_ms': sum(times) / len(times), 'max_ms': max(times)}
+
+
+def main(arguments):
+    """Runs the benchmark for every board and prints one row per board.
+
+    Parameters
+    ----------
+    arguments : list
+        The command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--boards', nargs='+', default=['9x9x10', '16x16x40', '16x30x99', '50x50x500'],
+                        help='boards given as ROWSxCOLUMNSxBOMBS')
+    parser.add_argument('--count', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(arguments)
+
+    print(f'{"board":>12} {"boards":>7} {"solvable":>9} {"attempts":>9} {"max":>5} {"mean ms":>10} {"max ms":>10}')
+    for board in options.boards:
+        rows, columns, number_of_bombs = [int(number) for number in board.split('x')]
+        result = bench(rows, columns, number_of_bombs, options.count, options.seed)
+        print(f'{board:>12} {result["boards"]:>7} {result["solvable"]:>9.0%} {result["mean_attempts"]:>9.2f} '
+              f'{result["max_attempts"]:>5} {result["mean_ms"]:>10.2f} {result["max_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
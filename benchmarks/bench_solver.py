@@ -0,0 +1,83 @@
+"""Measures how long the solver needs to play boards of several sizes and
+bomb densities from the first click until it is won or stuck.
+
+    python benchmarks/bench_solver.py --sizes 16 64 256 --densities 0.1 0.15 0.2
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'minesweeper'))
+
+from engine import Game  # noqa: E402
+from solver import Solver, play_without_guessing  # noqa: E402
+
+
+def bench(size, density, number_of_games, seed):
+    """Plays several boards with the solver.
+
+    Parameters
+    ----------
+    size : int
+        The number of rows and columns of the boards
+    density : float
+        The fraction of the squares that hold a bomb
+    number_of_games : int
+        The number of boards that are played
+    seed : int
+        The seed of the first board; the next boards use the following seeds
+
+    Returns
+    ----------
+    dict
+        The number of games, the fraction won without guessing, the mean and
+        the maximum solving time in milliseconds and the fraction of the safe
+        squares that were opened
+    """
+
+    number_of_bombs = int(size * size * density)
+    times = []
+    won = 0
+    opened_fraction = 0.0
+    for i in range(number_of_games):
+        game = Game(size, size, number_of_bombs, seed=seed + i)
+        game.start_round((size // 2, size // 2))
+
+        start_time = perf_counter()
+        won += play_without_guessing(game, Solver(game))
+        times.append((perf_counter() - start_time) * 1000)
+        opened_fraction += game.number_of_opened_squares / (size * size - number_of_bombs)
+
+    return {'games': number_of_games, 'won': won / number_of_games, 'mean_ms': sum(times) / len(times),
+            'max_ms': max(times), 'opened': opened_fraction / number_of_games}
+
+
+def main(arguments):
+    """Runs the benchmark for every combination of size and density and
+    prints one row per combination.
+
+    Parameters
+    ----------
+    arguments : list
+        The command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 32, 64, 128])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.15, 0.2])
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(arguments)
+
+    print(f'{"size":>6} {"density":>8} {"games":>6} {"won":>6} {"opened":>7} {"mean ms":>10} {"max ms":>10}')
+    for size in options.sizes:
+        for density in options.densities:
+            result = bench(size, density, options.games, options.seed)
+            print(f'{size:>6} {density:>8.2f} {result["games"]:>6} {result["won"]:>6.0%} {result["opened"]:>7.1%} '
+                  f'{result["mean_ms"]:>10.2f} {result["max_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
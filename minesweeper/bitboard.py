@@ -0,0 +1,428 @@
+"""This module contains an optional bitboard backend for the game engine.
+Every layer of the board (bombs, opened squares, flags and question marks) is
+kept as one arbitrary-precision integer with a bit for each square, so bomb
+lookups, neighbourhoods, flood fills and counts become shift, AND and
+popcount operations instead of list scans.
+"""
+
+import re
+
+from engine import Game, STATES
+
+
+def popcount(value):
+    """Counts the bits set in a non-negative integer.
+
+    Parameters
+    ----------
+    value : int
+        A non-negative integer
+
+    Returns
+    ----------
+    int
+        The number of bits that are set
+    """
+
+    return bin(value).count('1')
+
+
+class BitBoard:
+    """The layers of a board stored as bitsets. Square (row, column) is bit
+    row * width + column, where width has one spare column that is never
+    part of the board, so horizontal shifts cannot wrap into the next row.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    """
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.width = columns + 1
+        self.size = rows * self.width
+
+        row_mask = (1 << columns) - 1
+        self.board_mask = row_mask * ((1 << self.size) - 1) // ((1 << self.width) - 1)
+
+        self.bombs = 0
+        self.opened = 0
+        self.flagged = 0
+        self.marked = 0
+        self.zeros = 0
+        self.numbered = 0
+
+    def bit(self, row, column):
+        """Returns the bitset that only holds the given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ----------
+        int
+            A bitset with a single bit set
+        """
+
+        return 1 << (row * self.width + column)
+
+    def from_coords(self, list_of_squares):
+        """Builds a bitset from a list of squares.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares
+
+        Returns
+        ----------
+        int
+            A bitset holding the given squares
+        """
+
+        buffer = bytearray(self.size // 8 + 1)
+        width = self.width
+        for row, column in list_of_squares:
+            index = row * width + column
+            buffer[index >> 3] |= 1 << (index & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def to_coords(self, value):
+        """Lists the squares held by a bitset.
+
+        Parameters
+        ----------
+        value : int
+            A bitset of squares
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares, in
+            row-major order
+        """
+
+        bits = format(value, 'b')[::-1]
+        width = self.width
+        return [divmod(match.start(), width) for match in re.finditer('1', bits)]
+
+    def dilate(self, value):
+        """Grows a bitset by one square in all eight directions.
+
+        Parameters
+        ----------
+        value : int
+            A bitset of squares
+
+        Returns
+        ----------
+        int
+            A bitset holding the given squares and all their neighbours
+        """
+
+        horizontal = value | (value << 1) | (value >> 1)
+        return (horizontal | (horizontal << self.width) | (horizontal >> self.width)) & self.board_mask
+
+    def dilate_orthogonally(self, value):
+        """Grows a bitset by one square horizontally and vertically.
+
+        Parameters
+        ----------
+        value : int
+            A bitset of squares
+
+        Returns
+        ----------
+        int
+            A bitset holding the given squares and their horizontal and
+            vertical neighbours
+        """
+
+        width = self.width
+        return (value | (value << 1) | (value >> 1) | (value << width) | (value >> width)) & self.board_mask
+
+    def count_neighbours(self, layer):
+        """Counts, for every square, the neighbours that are set in a layer,
+        adding the eight shifted copies of the layer with bit-sliced adders.
+
+        Parameters
+        ----------
+        layer : int
+            A bitset of squares
+
+        Returns
+        ----------
+        list
+            Four bitsets, the binary digits of every count from the least
+            significant to the most significant
+        """
+
+        planes = [0, 0, 0, 0]
+        for i in [-1, 0, 1]:
+            for j in [-1, 0, 1]:
+                if i == 0 and j == 0:
+                    continue
+                offset = i * self.width + j
+                if offset > 0:
+                    carry = (layer >> offset) & self.board_mask
+                else:
+                    carry = (layer << -offset) & self.board_mask
+                for k in range(4):
+                    planes[k], carry = planes[k] ^ carry, planes[k] & carry
+                    if not carry:
+                        break
+        return planes
+
+    def flood(self, seed, region):
+        """Grows a seed horizontally and vertically while it stays inside the
+        given region.
+
+        Parameters
+        ----------
+        seed : int
+            A bitset of squares inside the region
+        region : int
+            A bitset of squares the flood may cover
+
+        Returns
+        ----------
+        int
+            A bitset holding the squares of the region linked to the seed
+        """
+
+        while True:
+            grown = self.dilate_orthogonally(seed) & region
+            if grown == seed:
+                return seed
+            seed = grown
+
+
+class BitboardGame(Game):
+    """A game of minesweeper that keeps its board in bitsets next to the
+    matrix of states and answers the hot queries from them.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs that the round will have
+    debug : bool
+        If True, the counters of the game are checked against a full scan of
+        the board after every action
+    seed : int
+        The seed of the bomb generator; a random one is chosen if None
+    """
+
+    def __init__(self, rows, columns, number_of_bombs, debug=False, seed=None):
+        self.board = BitBoard(rows, columns)
+        super().__init__(rows, columns, number_of_bombs, debug, seed)
+
+    def init_matrix_state(self):
+        """Initializes all matrix square states to 'blocked'."""
+
+        super().init_matrix_state()
+        self.board.opened = 0
+        self.board.flagged = 0
+        self.board.marked = 0
+
+    def set_bombs(self, bombs):
+        """Places the given bombs on the board.
+
+        Parameters
+        ----------
+        bombs : array
+            The positions of the bombs, indexed like the states
+        """
+
+        super().set_bombs(bombs)
+        self.board.bombs = self.board.from_coords(divmod(position, self.columns) for position in self.bombs)
+
+    def is_bomb(self, coords):
+        """Checks if there is a bomb on a given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the given square holds a bomb
+        """
+
+        return (self.board.bombs >> (coords[0] * self.board.width + coords[1])) & 1 == 1
+
+    def set_square_state(self, row, column, state):
+        """Changes the state of a given square in the matrix and in the
+        bitsets.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        state : int
+            An integer representing one of the values in STATES
+        """
+
+        super().set_square_state(row, column, state)
+
+        board = self.board
+        bit = board.bit(row, column)
+        board.opened &= ~bit
+        board.flagged &= ~bit
+        board.marked &= ~bit
+        if state == STATES['unblocked']:
+            board.opened |= bit
+        elif state == STATES['flagged']:
+            board.flagged |= bit
+        elif state == STATES['marked']:
+            board.marked |= bit
+
+    def generate_numbers(self):
+        """Computes the number of bombs neighbouring each square, and the
+        bitsets of squares with zero and with a positive number of bombs
+        next to them."""
+
+        super().generate_numbers()
+
+        board = self.board
+        planes = board.count_neighbours(board.bombs)
+        has_bombs_next_to_it = planes[0] | planes[1] | planes[2] | planes[3]
+        safe_squares = board.board_mask & ~board.bombs
+        board.zeros = safe_squares & ~has_bombs_next_to_it
+        board.numbered = safe_squares & has_bombs_next_to_it
+
+    def get_number_of_bombs_next_to_coords(self, row, column):
+        """Computes the number of bombs next to a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ----------
+        int
+            An integer that represents the number of bombs adjacent to the
+            given square
+        """
+
+        board = self.board
+        return popcount(board.bombs & board.dilate(board.bit(row, column)))
+
+    def get_adjacent_empty_terrain(self, coords):
+        """Returns terrain with zero bombs as neighbours, that is adjacent to
+        the given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to zero bombs and are linked to the given square
+        """
+
+        board = self.board
+        seed = board.bit(*coords)
+        return board.to_coords(board.flood(seed, board.zeros | seed))
+
+    def get_adjacent_numbers(self, terrain):
+        """Returns the list of squares that represents the outline with
+        numbers of an empty terrain.
+
+        Parameters
+        ----------
+        terrain : list
+            A list of tuples representing coordinates of squares linked to
+            each other and having zero bombs adjacent to them
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to the terrain, and to minimum one bomb, and that are not
+            bombs
+        """
+
+        board = self.board
+        terrain_mask = board.from_coords(terrain)
+        return board.to_coords(board.dilate(terrain_mask) & ~terrain_mask & board.numbered)
+
+    def clear_squares(self, list_of_squares):
+        """Clears a batch of squares, the empty terrain adjacent to them, and
+        its outline that contains numbers, computing the whole area as a
+        single bitset.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares without a
+            bomb
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened
+        """
+
+        board = self.board
+        area = board.from_coords(list_of_squares)
+        if area & board.zeros:
+            terrain = board.flood(area & board.zeros, board.zeros)
+            area |= terrain | (board.dilate(terrain) & board.numbered)
+
+        terrain_to_clear = board.to_coords(area)
+        for row, column in terrain_to_clear:
+            Game.set_square_state(self, row, column, STATES['unblocked'])
+
+        board.opened |= area
+        board.flagged &= ~area
+        board.marked &= ~area
+        return terrain_to_clear
+
+    def count_flags(self):
+        """Counts placed flags.
+
+        Returns
+        ----------
+        int
+            An integer that represents the number of flags that are currently
+            on the board
+        """
+
+        return popcount(self.board.flagged)
+
+    def is_game_completed(self):
+        """Checks if the game is won by checking that every square without a
+        bomb was opened.
+
+        Returns
+        ----------
+        bool
+            A bool representing the state of the game
+            (True = complete, False = incomplete)
+        """
+
+        board = self.board
+        return board.board_mask & ~board.bombs & ~board.opened == 0
@@ -0,0 +1,127 @@
+"""This module contains the clock of the game. It measures the time of
+every round, and counts down when the round has a time limit. The clock
+runs on the tkinter event loop instead of a thread: it measures time against
+a monotonic start point and only wakes up when the displayed number of
+seconds changes.
+"""
+
+import math
+from time import perf_counter
+
+
+class GameClock:
+    """A clock that can be paused and resumed and measures the elapsed time
+    with millisecond resolution, counting down when it has a time limit.
+
+    Parameters
+    ----------
+    widget : Widget
+        A tkinter widget whose after method schedules the wakeups
+    on_tick : callable
+        Called with the number of seconds left whenever it changes, if there
+        is a time limit
+    on_expire : callable
+        Called once when no time is left, if there is a time limit
+    """
+
+    def __init__(self, widget, on_tick, on_expire):
+        self.widget = widget
+        self.on_tick = on_tick
+        self.on_expire = on_expire
+
+        self.total_seconds = 0
+        self.started_at = None
+        self.elapsed_before_pause = 0.0
+        self.displayed_seconds = None
+        self.wakeup = None
+
+    @property
+    def running(self):
+        """bool: True if the clock is counting."""
+
+        return self.started_at is not None
+
+    @property
+    def elapsed_seconds(self):
+        """float: The time counted so far, without the paused periods."""
+
+        if self.started_at is None:
+            return self.elapsed_before_pause
+        return self.elapsed_before_pause + perf_counter() - self.started_at
+
+    @property
+    def elapsed_milliseconds(self):
+        """int: The time counted so far in milliseconds."""
+
+        return int(self.elapsed_seconds * 1000)
+
+    @property
+    def seconds_left(self):
+        """int: The number of seconds left, as shown to the player."""
+
+        return self.total_seconds - int(self.elapsed_seconds)
+
+    def start(self, seconds, elapsed_seconds=0.0):
+        """Starts counting, down from the given number of seconds if it is not
+        0.
+
+        Parameters
+        ----------
+        seconds : int
+            Time limit in seconds, 0 for a round without one
+        elapsed_seconds : float
+            Time already counted, for a game that is resumed
+        """
+
+        self.stop()
+        self.total_seconds = seconds
+        self.elapsed_before_pause = elapsed_seconds
+        self.displayed_seconds = None
+        self.resume()
+
+    def stop(self):
+        """Stops the clock and forgets the elapsed time."""
+
+        self.pause()
+        self.elapsed_before_pause = 0.0
+
+    def pause(self):
+        """Stops counting, keeping the elapsed time."""
+
+        if self.wakeup is not None:
+            self.widget.after_cancel(self.wakeup)
+            self.wakeup = None
+        if self.started_at is not None:
+            self.elapsed_before_pause += perf_counter() - self.started_at
+            self.started_at = None
+
+    def resume(self):
+        """Continues counting after a pause."""
+
+        if self.started_at is None:
+            self.started_at = perf_counter()
+            self.tick()
+
+    def tick(self):
+        """Reports the seconds left if they changed, and schedules the next
+        wakeup for the moment the displayed seconds change again. Without a
+        time limit there is nothing to report."""
+
+        self.wakeup = None
+        if not self.total_seconds:
+            return
+
+        elapsed_seconds = self.elapsed_seconds
+        seconds_left = self.total_seconds - int(elapsed_seconds)
+
+        if seconds_left != self.displayed_seconds:
+            self.displayed_seconds = seconds_left
+            self.on_tick(seconds_left)
+
+        if seconds_left <= 0:
+            self.pause()
+            self.on_expire()
+            return
+
+        milliseconds_to_next_second = math.ceil((int(elapsed_seconds) + 1 - elapsed_seconds) * 1000)
+        self.wakeup = self.widget.after(max(1, milliseconds_to_next_second), self.tick)
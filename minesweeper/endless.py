@@ -0,0 +1,459 @@
+"""This module contains the endless mode of minesweeper. The board has no
+borders and is split into square chunks. The bombs of a chunk are derived
+from the seed of the board and the coordinates of the chunk, so a chunk is
+only generated when it is touched, and it can be dropped from memory and
+generated again identically later. Only a compressed summary of the states
+of an evicted chunk is kept, by default in a dbm file in a temporary
+directory.
+"""
+
+import dbm
+import os
+import random
+import shutil
+import tempfile
+import zlib
+from collections import OrderedDict
+
+from engine import BOMB, Game, STATES
+
+
+class Chunk:
+    """The numbers and states of the squares of one chunk, stored row by row
+    with one byte per square.
+
+    Parameters
+    ----------
+    numbers : bytearray
+        The number of bombs next to each square, or BOMB for bombs
+    states : bytearray
+        The state of each square, one of the values in STATES
+    """
+
+    def __init__(self, numbers, states):
+        self.numbers = numbers
+        self.states = states
+
+
+class EndlessBoard:
+    """A board without borders, generated lazily chunk by chunk. The loaded
+    chunks are kept in a least recently used order, and the oldest ones are
+    evicted when there are more than 'maximum_loaded_chunks' of them.
+
+    Parameters
+    ----------
+    seed : int
+        The seed the bombs of every chunk are derived from
+    chunk_size : int
+        The number of rows and columns of a chunk
+    density : float
+        The fraction of the squares of a chunk that hold a bomb
+    maximum_loaded_chunks : int
+        The number of chunks that are kept in memory
+    summaries : MutableMapping
+        Where the compressed states of evicted chunks are stored. By default
+        they are written to a dbm file in a temporary directory, removed by
+        close, so they stay out of memory no matter how far the player goes.
+        A dict keeps them in memory instead, growing by one summary for
+        every chunk that was visited and evicted
+    maximum_flood : int
+        The maximum number of squares opened by a single click, since an
+        empty region of an endless board may have no end
+    """
+
+    def __init__(self, seed, chunk_size=32, density=0.15, maximum_loaded_chunks=64, summaries=None,
+                 maximum_flood=4096):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.density = density
+        self.maximum_loaded_chunks = maximum_loaded_chunks
+        self.summaries_directory = None
+        if summaries is None:
+            self.summaries_directory = tempfile.mkdtemp(prefix='minesweeper-')
+            summaries = dbm.open(os.path.join(self.summaries_directory, 'summaries'), 'n')
+        self.summaries = summaries
+        self.maximum_flood = maximum_flood
+
+        self.chunks = OrderedDict()
+        self.chunk_bombs = OrderedDict()
+
+        self.number_of_opened_squares = 0
+        self.number_of_flags = 0
+        self.number_of_marks = 0
+        self.dirty_squares = None
+        self.finished = False
+
+    def close(self):
+        """Closes the default store of the summaries and removes its
+        directory. A store given to the board is left open."""
+
+        if self.summaries_directory is not None:
+            self.summaries.close()
+            shutil.rmtree(self.summaries_directory)
+            self.summaries_directory = None
+
+    def generate_chunk_bombs(self, chunk_coords):
+        """Returns the bombs of a chunk, derived from the seed of the board
+        and the coordinates of the chunk. The starting square and its
+        neighbours never hold a bomb.
+
+        Parameters
+        ----------
+        chunk_coords : tuple
+            Tuple that represents the coordinates of the chunk
+
+        Returns
+        ----------
+        set
+            A set of tuples representing coordinates of the bombs
+        """
+
+        bombs = self.chunk_bombs.get(chunk_coords)
+        if bombs is not None:
+            self.chunk_bombs.move_to_end(chunk_coords)
+            return bombs
+
+        chunk_row, chunk_column = chunk_coords
+        size = self.chunk_size
+        generator = random.Random(f'{self.seed}:{chunk_row}:{chunk_column}')
+
+        bombs = set()
+        for position in generator.sample(range(size * size), int(size * size * self.density)):
+            local_row, local_column = divmod(position, size)
+            row = chunk_row * size + local_row
+            column = chunk_column * size + local_column
+            if abs(row) > 1 or abs(column) > 1:
+                bombs.add((row, column))
+
+        self.chunk_bombs[chunk_coords] = bombs
+        if len(self.chunk_bombs) > 9 * self.maximum_loaded_chunks:
+            self.chunk_bombs.popitem(last=False)
+        return bombs
+
+    def generate_chunk(self, chunk_coords):
+        """Generates the numbers of a chunk, from its bombs and the bombs of
+        the neighbouring chunks, and restores its states if it was evicted
+        before.
+
+        Parameters
+        ----------
+        chunk_coords : tuple
+            Tuple that represents the coordinates of the chunk
+
+        Returns
+        ----------
+        Chunk
+            The generated chunk
+        """
+
+        chunk_row, chunk_column = chunk_coords
+        size = self.chunk_size
+        top = chunk_row * size - 1
+        left = chunk_column * size - 1
+
+        bombs = []
+        for i in [-1, 0, 1]:
+            for j in [-1, 0, 1]:
+                for row, column in self.generate_chunk_bombs((chunk_row + i, chunk_column + j)):
+                    if top <= row <= top + size + 1 and left <= column <= left + size + 1:
+                        bombs.append((row - top) * (size + 2) + column - left)
+
+        padded_chunk = Game(size + 2, size + 2, len(bombs))
+        padded_chunk.set_bombs(bombs)
+        padded_chunk.generate_numbers()
+
+        numbers = bytearray(size * size)
+        for local_row in range(size):
+            start = (local_row + 1) * (size + 2) + 1
+            numbers[local_row * size:(local_row + 1) * size] = padded_chunk.numbers[start:start + size]
+
+        key = self.get_summary_key(chunk_coords)
+        if key in self.summaries:
+            states = bytearray(zlib.decompress(self.summaries[key]))
+            del self.summaries[key]
+        else:
+            states = bytearray(size * size)
+        return Chunk(numbers, states)
+
+    @staticmethod
+    def get_summary_key(chunk_coords):
+        """Returns the key under which the summary of a chunk is stored.
+
+        Parameters
+        ----------
+        chunk_coords : tuple
+            Tuple that represents the coordinates of the chunk
+
+        Returns
+        ----------
+        str
+            The key of the summary
+        """
+
+        return f'{chunk_coords[0]},{chunk_coords[1]}'
+
+    def get_chunk(self, chunk_coords):
+        """Returns a chunk, generating it if it is not loaded and evicting the
+        least recently used chunk if too many are loaded.
+
+        Parameters
+        ----------
+        chunk_coords : tuple
+            Tuple that represents the coordinates of the chunk
+
+        Returns
+        ----------
+        Chunk
+            The chunk with the given coordinates
+        """
+
+        chunk = self.chunks.get(chunk_coords)
+        if chunk is not None:
+            self.chunks.move_to_end(chunk_coords)
+            return chunk
+
+        chunk = self.generate_chunk(chunk_coords)
+        self.chunks[chunk_coords] = chunk
+        if len(self.chunks) > self.maximum_loaded_chunks:
+            self.evict_chunk()
+        return chunk
+
+    def evict_chunk(self):
+        """Drops the least recently used chunk from memory, keeping a
+        compressed summary of its states if any square was changed."""
+
+        chunk_coords, chunk = self.chunks.popitem(last=False)
+        if any(chunk.states):
+            self.summaries[self.get_summary_key(chunk_coords)] = zlib.compress(bytes(chunk.states))
+
+    def locate(self, row, column):
+        """Returns the chunk of a square and the index of the square inside
+        the chunk.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square
+        column : int
+            The column of a square
+
+        Returns
+        ----------
+        tuple
+            A tuple of the chunk and the index of the square inside it
+        """
+
+        size = self.chunk_size
+        chunk = self.get_chunk((row // size, column // size))
+        return chunk, (row % size) * size + column % size
+
+    def is_bomb(self, coords):
+        """Checks if there is a bomb on a given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the given square holds a bomb
+        """
+
+        chunk, index = self.locate(*coords)
+        return chunk.numbers[index] == BOMB
+
+    def get_square_number(self, row, column):
+        """Returns the number of bomb neighbours for a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square
+        column : int
+            The column of a square
+
+        Returns
+        ---------
+        int
+            An integer representing the number of bombs adjacent to the given
+            square, or BOMB if the square holds a bomb
+        """
+
+        chunk, index = self.locate(row, column)
+        return chunk.numbers[index]
+
+    def get_square_state(self, row, column):
+        """Returns the state of a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square
+        column : int
+            The column of a square
+
+        Returns
+        ---------
+        int
+            An integer representing one of the values in STATES
+        """
+
+        chunk, index = self.locate(row, column)
+        return chunk.states[index]
+
+    def set_square_state(self, row, column, state):
+        """Changes the state of a given square and updates the counters.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square
+        column : int
+            The column of a square
+        state : int
+            An integer representing one of the values in STATES
+        """
+
+        chunk, index = self.locate(row, column)
+        previous_state = chunk.states[index]
+        if previous_state == state:
+            return
+        chunk.states[index] = state
+        if self.dirty_squares is not None:
+            self.dirty_squares.add((row, column))
+
+        if previous_state == STATES['unblocked']:
+            self.number_of_opened_squares -= 1
+        elif previous_state == STATES['flagged']:
+            self.number_of_flags -= 1
+        elif previous_state == STATES['marked']:
+            self.number_of_marks -= 1
+
+        if state == STATES['unblocked']:
+            self.number_of_opened_squares += 1
+        elif state == STATES['flagged']:
+            self.number_of_flags += 1
+        elif state == STATES['marked']:
+            self.number_of_marks += 1
+
+    def clear_terrain(self, square_coords):
+        """Clears the given square, the empty terrain adjacent to it, and the
+        outline that contains numbers. At most 'maximum_flood' squares are
+        newly opened; clicking the edge of a partly opened terrain continues
+        it. Flagged squares are left closed.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened
+        """
+
+        if self.get_square_state(*square_coords) == STATES['flagged']:
+            return []
+        if self.get_square_number(*square_coords) != 0:
+            self.set_square_state(square_coords[0], square_coords[1], STATES['unblocked'])
+            return [square_coords]
+
+        terrain = [square_coords]
+        visited = {square_coords}
+        number_of_new_squares = 0
+        index = 0
+        while index < len(terrain) and number_of_new_squares < self.maximum_flood:
+            row, column = terrain[index]
+            index += 1
+            for i, j in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
+                neighbour_coords = row + i, column + j
+                if neighbour_coords not in visited and self.get_square_number(*neighbour_coords) == 0:
+                    visited.add(neighbour_coords)
+                    terrain.append(neighbour_coords)
+                    if self.get_square_state(*neighbour_coords) != STATES['unblocked']:
+                        number_of_new_squares += 1
+
+        outline = []
+        for row, column in terrain:
+            for i in [-1, 0, 1]:
+                for j in [-1, 0, 1]:
+                    neighbour_coords = row + i, column + j
+                    if neighbour_coords not in visited and 0 < self.get_square_number(*neighbour_coords) < BOMB:
+                        visited.add(neighbour_coords)
+                        outline.append(neighbour_coords)
+
+        terrain_to_clear = [(row, column) for row, column in terrain + outline
+                            if self.get_square_state(row, column) != STATES['flagged']]
+        for row, column in terrain_to_clear:
+            self.set_square_state(row, column, STATES['unblocked'])
+        return terrain_to_clear
+
+    def click_square(self, square_coords):
+        """Handles square left-clicks. Clicking a bomb finishes the game, and
+        clicking a flagged square does nothing.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened (empty if a bomb or a flag was clicked)
+        """
+
+        if self.get_square_state(*square_coords) == STATES['flagged']:
+            return []
+        if self.is_bomb(square_coords):
+            self.finished = True
+            return []
+        return self.clear_terrain(square_coords)
+
+    def place_or_erase_flag_on_square(self, square_coords):
+        """Places or removes an already placed flag on a specific square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the state of the square was changed
+        """
+
+        state = self.get_square_state(*square_coords)
+        if state == STATES['blocked']:
+            self.set_square_state(square_coords[0], square_coords[1], STATES['flagged'])
+        elif state == STATES['flagged']:
+            self.set_square_state(square_coords[0], square_coords[1], STATES['blocked'])
+        return state in [STATES['blocked'], STATES['flagged']]
+
+    def place_or_erase_question_mark_on_square(self, square_coords):
+        """Places or removes an already placed question mark on a specific
+        square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the state of the square was changed
+        """
+
+        state = self.get_square_state(*square_coords)
+        if state == STATES['blocked']:
+            self.set_square_state(square_coords[0], square_coords[1], STATES['marked'])
+        elif state == STATES['marked']:
+            self.set_square_state(square_coords[0], square_coords[1], STATES['blocked'])
+        return state in [STATES['blocked'], STATES['marked']]
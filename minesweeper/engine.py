@@ -0,0 +1,1060 @@
+"""This module contains the game engine of minesweeper. It holds the state of
+a single game and applies the rules of the game without depending on tkinter,
+so it can be imported and instantiated many times per process without a
+display.
+"""
+
+import random
+from array import array
+from itertools import compress
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+STATES = {'blocked': 0, 'unblocked': 1, 'flagged': 2, 'marked': 3}
+
+BOMB = 9
+
+# Translation table turning the free bytes of a mask into ones and every
+# other byte into zeros.
+FREE_POSITIONS = bytes([1]) + bytes(255)
+
+
+def sample_positions(generator, number_of_positions, k, excluded_positions=None):
+    """Picks k distinct random positions in range(number_of_positions) that
+    are not excluded. The positions are tracked in a mask of one byte per
+    position. If at most half of the allowed positions are picked, random
+    positions are drawn until enough new ones are found, so the time depends
+    on k instead of the number of positions. Otherwise the positions that
+    are not picked are drawn the same way and the picked ones are the rest.
+
+    Parameters
+    ----------
+    generator : Random
+        The random generator
+    number_of_positions : int
+        The number of positions
+    k : int
+        The number of positions to pick
+    excluded_positions : bytearray
+        A mask of one byte per position, non-zero on the positions that must
+        not be picked; it is changed in place. No position is excluded if
+        None
+
+    Returns
+    ----------
+    array
+        An array of k distinct positions
+
+    Raises
+    ----------
+    ValueError
+        If fewer than k positions are allowed
+    """
+
+    if excluded_positions is None:
+        mask = bytearray(number_of_positions)
+        number_of_allowed_positions = number_of_positions
+    else:
+        mask = excluded_positions
+        number_of_allowed_positions = mask.count(0)
+    if k > number_of_allowed_positions:
+        raise ValueError('Not enough positions to pick from')
+
+    if k * 2 > number_of_allowed_positions:
+        # Drawing the positions that are not picked marks them in the mask,
+        # so the picked ones are the positions left free.
+        sample_positions(generator, number_of_positions, number_of_allowed_positions - k, mask)
+        return array('I', compress(range(number_of_positions), mask.translate(FREE_POSITIONS)))
+
+    positions = array('I')
+    while len(positions) < k:
+        position = generator.randrange(number_of_positions)
+        if not mask[position]:
+            mask[position] = 1
+            positions.append(position)
+    return positions
+
+
+class Game:
+    """A single game of minesweeper with a given number of rows, columns and
+    bombs.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs that the round will have
+    debug : bool
+        If True, the counters of the game are checked against a full scan of
+        the board after every action
+    seed : int
+        The seed of the bomb generator; a random one is chosen if None
+    """
+
+    def __init__(self, rows, columns, number_of_bombs, debug=False, seed=None):
+        self.rows = rows
+        self.columns = columns
+        self.number_of_bombs = number_of_bombs
+        self.debug = debug
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.replay_log = None
+        self.layout = None
+        self.layout_numbers = None
+
+        self.number_of_opened_squares = 0
+        self.number_of_flags = 0
+        self.number_of_marks = 0
+
+        self.bombs = array('I')
+        self.bomb_mask = bytearray()
+        self.states = bytearray()
+        self.numbers = bytearray()
+        self.zero_regions = []
+        self.zero_region_labels = {}
+        self.dirty_squares = None
+        self.state_changes = None
+
+        self.started = False
+        self.finished = False
+        self.won = False
+
+        self.init_matrix_state()
+
+    def start_round(self, square_coords):
+        """Initializes the round values, generates bombs and square numbers,
+        clears terrain from clicked square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record('start', square_coords)
+
+        self.started = True
+        self.init_matrix_state()
+        self.generate_bombs(square_coords)
+        self.generate_numbers()
+        cleared_squares = self.clear_terrain(square_coords)
+
+        if self.debug:
+            self.check_counters()
+        return cleared_squares
+
+    def init_matrix_state(self):
+        """Initializes all matrix square states to 'blocked'. The states are
+        kept in a flat buffer of one byte per square, indexed by
+        row * columns + column."""
+
+        self.states = bytearray(self.rows * self.columns)
+
+        self.number_of_opened_squares = 0
+        self.number_of_flags = 0
+        self.number_of_marks = 0
+
+    def view_states(self):
+        """Returns the states of the board without copying them, as a view of
+        their buffer with one row of bytes per row of the board. NumPy can
+        wrap it with numpy.asarray. The view follows the changes of the
+        states until the board is initialized again.
+
+        Returns
+        ----------
+        memoryview
+            A two-dimensional view of the states, indexed by [row, column]
+        """
+
+        return memoryview(self.states).cast('B', (self.rows, self.columns))
+
+    def view_numbers(self):
+        """Returns the numbers of the board without copying them, as a view
+        of their buffer with one row of bytes per row of the board, and BOMB
+        on the bombs. The view is valid until the numbers are generated
+        again.
+
+        Returns
+        ----------
+        memoryview
+            A two-dimensional view of the numbers, indexed by [row, column]
+        """
+
+        return memoryview(self.numbers).cast('B', (self.rows, self.columns))
+
+    @property
+    def number_of_unopened_safe_squares(self):
+        """int: The number of squares without a bomb that were not opened."""
+
+        return self.rows * self.columns - len(self.bombs) - self.number_of_opened_squares
+
+    @property
+    def number_of_placed_flags(self):
+        """int: The number of flags that are currently on the board."""
+
+        return self.number_of_flags
+
+    @property
+    def number_of_placed_marks(self):
+        """int: The number of question marks that are currently on the
+        board."""
+
+        return self.number_of_marks
+
+    def scan_counters(self):
+        """Counts unopened squares without bombs, flags and question marks by
+        scanning the whole board.
+
+        Returns
+        ----------
+        tuple
+            A tuple of three integers: the number of unopened squares without
+            a bomb, the number of flags and the number of question marks
+        """
+
+        states = self.states
+        unopened_squares = len(states) - states.count(STATES['unblocked'])
+        unopened_bombs = sum(1 for position in self.bombs if states[position] != STATES['unblocked'])
+        return unopened_squares - unopened_bombs, states.count(STATES['flagged']), states.count(STATES['marked'])
+
+    def check_counters(self):
+        """Checks the counters of the game against a full scan of the board.
+
+        Raises
+        ----------
+        AssertionError
+            If a counter differs from the value found by the scan
+        """
+
+        counters = (self.number_of_unopened_safe_squares, self.number_of_placed_flags, self.number_of_placed_marks)
+        scanned = self.scan_counters()
+        if counters != scanned:
+            raise AssertionError(f'Counters {counters} do not match the board {scanned}')
+
+    def generate_bombs(self, square_coords):
+        """Generates bombs random inside the matrix, but not on the given
+        square or its neighbours. The bombs only depend on the seed of the
+        game and the given square: the layout of the seed is generated, or
+        taken from 'layout' if it was generated in advance together with its
+        'layout_numbers', and then adapted to the given square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+        """
+
+        if self.layout is None:
+            self.layout = self.generate_layout()
+        self.set_bombs(self.adapt_layout(self.layout, square_coords))
+
+    def generate_layout(self):
+        """Generates the bombs of the seed of the game, anywhere on the board.
+
+        Returns
+        ----------
+        array
+            The positions of the bombs, indexed like the states
+        """
+
+        return sample_positions(random.Random(self.seed), self.rows * self.columns, self.number_of_bombs)
+
+    def adapt_layout(self, layout, square_coords):
+        """Moves the bombs of a layout that are on the given square or its
+        neighbours to random free squares elsewhere. The moves only depend on
+        the seed of the game and the given square.
+
+        Parameters
+        ----------
+        layout : array
+            The positions of the bombs, indexed like the states
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        array
+            The positions of the bombs, none of them on the given square or
+            its neighbours
+
+        Raises
+        ----------
+        ValueError
+            If there are too many bombs to keep the given square and its
+            neighbours free
+        """
+
+        columns = self.columns
+        safe_positions = [i * columns + j for i, j in self.get_neighbours(square_coords)]
+        excluded_positions = bytearray(self.rows * columns)
+        for position in layout:
+            excluded_positions[position] = 1
+        bombs = array('I', layout)
+        moved_positions = [position for position in safe_positions if excluded_positions[position]]
+        if not moved_positions:
+            return bombs
+        if len(layout) > self.rows * columns - len(safe_positions):
+            raise ValueError('Too many bombs to keep the first square and its neighbours free')
+
+        for position in moved_positions:
+            bombs.remove(position)
+        for position in safe_positions:
+            excluded_positions[position] = 1
+        row, column = square_coords
+        generator = random.Random(f'{self.seed}:{row}:{column}')
+        bombs.extend(sample_positions(generator, self.rows * columns, len(moved_positions), excluded_positions))
+        return bombs
+
+    def set_bombs(self, bombs):
+        """Places the given bombs on the board, keeping their positions and a
+        mask of one byte per square that is 1 on the bombs.
+
+        Parameters
+        ----------
+        bombs : array
+            The positions of the bombs, indexed like the states
+        """
+
+        self.bombs = array('I', bombs)
+        self.bomb_mask = bytearray(self.rows * self.columns)
+        for position in self.bombs:
+            self.bomb_mask[position] = 1
+
+    def is_bomb(self, coords):
+        """Checks if there is a bomb on a given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the given square holds a bomb
+        """
+
+        return self.bomb_mask[coords[0] * self.columns + coords[1]] == 1
+
+    def generate_numbers(self):
+        """Computes the number of bombs neighbouring each square, in a flat
+        buffer of one byte per square indexed like the states, with BOMB on
+        the bombs. If the numbers of the layout were computed in advance,
+        only the squares around the bombs moved away from the first square
+        are counted again. Otherwise the counts are computed in one
+        vectorized pass when NumPy is available, and in pure Python
+        otherwise."""
+
+        if self.layout_numbers is not None:
+            self.numbers = self.update_layout_numbers()
+        else:
+            if np is not None:
+                self.numbers = self.count_neighbouring_bombs_with_numpy()
+            else:
+                self.numbers = self.count_neighbouring_bombs()
+
+            for position in self.bombs:
+                self.numbers[position] = BOMB
+
+        self.zero_regions = []
+        self.zero_region_labels = {}
+
+    def update_layout_numbers(self):
+        """Copies the numbers of the layout and counts again the squares next
+        to the bombs that were moved.
+
+        Returns
+        ----------
+        bytearray
+            The number of bombs adjacent to each square, with BOMB on the
+            bombs
+        """
+
+        # The bombs of the layout are cleared from a copy of the mask of the
+        # bombs: those missing from the mask were moved away, and those left
+        # in it were moved there.
+        columns = self.columns
+        added_bombs = bytearray(self.bomb_mask)
+        moved_bombs = []
+        for position in self.layout:
+            if added_bombs[position]:
+                added_bombs[position] = 0
+            else:
+                moved_bombs.append(position)
+        position = added_bombs.find(1)
+        while position != -1:
+            moved_bombs.append(position)
+            position = added_bombs.find(1, position + 1)
+
+        numbers = bytearray(self.layout_numbers)
+        for moved_bomb in moved_bombs:
+            for row, column in self.get_neighbours(divmod(moved_bomb, columns)):
+                if self.is_bomb((row, column)):
+                    numbers[row * columns + column] = BOMB
+                else:
+                    numbers[row * columns + column] = self.get_number_of_bombs_next_to_coords(row, column)
+        return numbers
+
+    def count_neighbouring_bombs(self):
+        """Counts the bombs adjacent to every square by adding each bomb to
+        the counters of its neighbours.
+
+        Returns
+        ----------
+        bytearray
+            The number of bombs adjacent to each square
+        """
+
+        columns = self.columns
+        numbers = bytearray(self.rows * columns)
+        for bomb in self.bombs:
+            for row, column in self.get_neighbours(divmod(bomb, columns)):
+                numbers[row * columns + column] += 1
+        return numbers
+
+    def count_neighbouring_bombs_with_numpy(self):
+        """Counts the bombs adjacent to every square by summing the nine
+        shifted views of a zero-padded bomb mask into a NumPy view of the
+        buffer of numbers.
+
+        Returns
+        ----------
+        bytearray
+            The number of bombs adjacent to each square
+        """
+
+        rows = self.rows
+        columns = self.columns
+        padded_mask = np.zeros((rows + 2, columns + 2), dtype=np.uint8)
+        padded_mask[1:-1, 1:-1] = np.frombuffer(self.bomb_mask, dtype=np.uint8).reshape(rows, columns)
+
+        numbers = bytearray(rows * columns)
+        counts = np.frombuffer(numbers, dtype=np.uint8).reshape(rows, columns)
+        for i in range(3):
+            for j in range(3):
+                counts += padded_mask[i:i + rows, j:j + columns]
+        return numbers
+
+    def get_number_of_bombs_next_to_coords(self, row, column):
+        """Computes the number of bombs next to a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ----------
+        int
+            An integer that represents the number of bombs adjacent to the
+            given square
+        """
+
+        number_of_bombs = 0
+        for i in [-1, 0, 1]:
+            for j in [-1, 0, 1]:
+                neighbour_coords = row + i, column + j
+                if self.is_inside_matrix(neighbour_coords) and self.is_bomb(neighbour_coords):
+                    number_of_bombs += 1
+        return number_of_bombs
+
+    def is_inside_matrix(self, coords):
+        """Checks if coordinates are not out of matrix bounds.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates a square that may be on the
+            board
+
+        Returns
+        ----------
+        bool
+            A bool showing if the given square coordinates are inside the
+            board (True = inside the board, False = invalid square)
+        """
+
+        row, column = coords
+        if row < 0 or column < 0 or row > self.rows - 1 or column > self.columns - 1:
+            return False
+        return True
+
+    def get_neighbours(self, coords):
+        """Returns neighbouring squares for a given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to the given square
+        """
+
+        neighbours = []
+        for i in [-1, 0, 1]:
+            for j in [-1, 0, 1]:
+                neighbour = (coords[0] + i, coords[1] + j)
+                if self.is_inside_matrix(neighbour):
+                    neighbours.append(neighbour)
+        return neighbours
+
+    def get_square_state(self, row, column):
+        """Returns the state of a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ---------
+        int
+            An integer representing one of the values in STATES
+        """
+
+        return self.states[row * self.columns + column]
+
+    def set_square_state(self, row, column, state):
+        """Changes the state of a given square. Every state change of the
+        board goes through this method, which also records the square in the
+        dirty set when a renderer collects one, and the change in the list of
+        state changes when a history collects one.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        state : int
+            An integer representing one of the values in STATES
+        """
+
+        index = row * self.columns + column
+        previous_state = self.states[index]
+        if previous_state == state:
+            return
+        self.states[index] = state
+        if self.dirty_squares is not None:
+            self.dirty_squares.add((row, column))
+        if self.state_changes is not None:
+            self.state_changes.append(index * 16 + previous_state * 4 + state)
+
+        if previous_state == STATES['unblocked']:
+            self.number_of_opened_squares -= 1
+        elif previous_state == STATES['flagged']:
+            self.number_of_flags -= 1
+        elif previous_state == STATES['marked']:
+            self.number_of_marks -= 1
+
+        if state == STATES['unblocked']:
+            self.number_of_opened_squares += 1
+        elif state == STATES['flagged']:
+            self.number_of_flags += 1
+        elif state == STATES['marked']:
+            self.number_of_marks += 1
+
+    def get_square_number(self, row, column):
+        """Returns the number of bomb neighbours for a given square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ---------
+        int
+            An integer representing the number of bombs adjacent to the given
+            square, or BOMB if the square holds a bomb
+        """
+
+        return self.numbers[row * self.columns + column]
+
+    def is_number(self, row, column):
+        """Checks if a given square as a number of adjacent bombs, that is
+        grater that 0.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the given square is adjacent to minimum
+            one bomb (True = is adjacent to minimum one bomb, False = is
+            adjacent to zero bombs)
+        """
+
+        return 0 < self.numbers[row * self.columns + column] < BOMB
+
+    def get_new_empty_neighbours(self, visited, current_coords):
+        """Returns unvisited horizontally or vertically linked squares with
+        zero bombs as neighbours to a given one.
+
+        Parameters
+        ----------
+        visited : set
+            A set of already checked squares
+        current_coords : tuple
+            A tuple that represents the coordinates of the square on the board
+
+        Return
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to zero bombs, are not found inside the visited set, and
+            are also adjacent to the given square
+        """
+
+        empty_neighbours = []
+        for i, j in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
+            neighbour_coords = current_coords[0] + i, current_coords[1] + j
+            if self.is_inside_matrix(neighbour_coords):
+                if not self.is_bomb(neighbour_coords) and neighbour_coords not in visited and \
+                        self.numbers[neighbour_coords[0] * self.columns + neighbour_coords[1]] == 0:
+                    empty_neighbours.append(neighbour_coords)
+
+        return empty_neighbours
+
+    def get_adjacent_empty_terrain(self, coords):
+        """Returns terrain with zero bombs as neighbours, that is adjacent to
+        the given square.
+
+        Parameters
+        ----------
+        coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to zero bombs and are linked to the given square
+        """
+
+        q = [coords]
+        visited = {coords}
+        index = 0
+
+        while index < len(q):
+            current_coords = q[index]
+            neighbors = self.get_new_empty_neighbours(visited, current_coords)
+            q.extend(neighbors)
+            visited.update(neighbors)
+            index += 1
+
+        return q
+
+    def get_adjacent_numbers(self, terrain):
+        """Returns the list of squares that represents the outline with
+        numbers of an empty terrain.
+
+        Parameters
+        ----------
+        terrain : list
+            A list of tuples representing coordinates of squares linked to
+            each other and having zero bombs adjacent to them
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of squares that are
+            adjacent to the terrain, and to minimum one bomb, and that are not
+            bombs
+        """
+
+        adjacent_squares = []
+        terrain = set(terrain)
+        checked = set(terrain)
+
+        for terrain_row, terrain_column in terrain:
+            for i in [-1, 0, 1]:
+                for j in [-1, 0, 1]:
+                    coords = terrain_row + i, terrain_column + j
+                    if coords in checked:
+                        continue
+                    checked.add(coords)
+
+                    row, column = coords
+                    if self.is_inside_matrix(coords) and self.is_number(row, column):
+                        if self.is_only_diagonally_linked(row, column, terrain):
+                            adjacent_squares.append(coords)
+
+        return adjacent_squares
+
+    @staticmethod
+    def is_only_diagonally_linked(row, column, terrain):
+        """Checks if a given square is only diagonally linked to a terrain or
+        not.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        terrain : set
+            A set of tuples representing coordinates of squares linked to
+            each other and having zero bombs adjacent to them
+
+        Returns
+        ----------
+        bool
+            A bool that represents if a given square is only diagonally linked
+            to the given terrain
+        """
+
+        for i, j in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
+            coords = (row + i, column + j)
+            if coords not in terrain:
+                return True
+        return False
+
+    def get_zero_region(self, square_coords):
+        """Returns the region of linked squares with zero bombs as neighbours
+        that contains the given square, together with its outline of numbers.
+        Every region is labeled the first time one of its squares is cleared,
+        and later clicks inside it only look the label up. Like labeling the
+        whole board when the round starts, this floods every region at most
+        once, but the regions that are never cleared are never flooded.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of a square with zero bombs
+            as neighbours
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares of the
+            region, followed by the squares of its outline
+        """
+
+        label = self.zero_region_labels.get(square_coords)
+        if label is not None:
+            return list(self.zero_regions[label])
+
+        empty_terrain = self.get_adjacent_empty_terrain(square_coords)
+        label = len(self.zero_regions)
+        self.zero_regions.append(empty_terrain + self.get_adjacent_numbers(empty_terrain))
+        for square in empty_terrain:
+            self.zero_region_labels[square] = label
+        return list(self.zero_regions[label])
+
+    def mark_open_states(self, list_of_squares):
+        """Marks a list of squares as 'open' in the matrix of states.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            The list of squares that will be unblocked logically
+        """
+
+        for row, column in list_of_squares:
+            self.set_square_state(row, column, STATES['unblocked'])
+
+    def get_area_to_clear(self, list_of_squares):
+        """Returns the squares opened by clearing a batch of squares: every
+        square with a number, and for every square with zero bombs as
+        neighbours, its region and the outline of the region. A region is
+        only added once, however many of its squares are in the batch.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares without a
+            bomb
+
+        Returns
+        ----------
+        list
+            A list of distinct tuples representing coordinates of the squares
+            to open
+        """
+
+        area = []
+        added = set()
+        for square_coords in list_of_squares:
+            if square_coords in added:
+                continue
+            if self.numbers[square_coords[0] * self.columns + square_coords[1]] == 0:
+                terrain_to_clear = self.get_zero_region(square_coords)
+            else:
+                terrain_to_clear = [square_coords]
+            for coords in terrain_to_clear:
+                if coords not in added:
+                    added.add(coords)
+                    area.append(coords)
+        return area
+
+    def clear_squares(self, list_of_squares):
+        """Clears a batch of squares, the empty terrain adjacent to them, and
+        its outline that contains numbers, in one pass.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares without a
+            bomb
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened
+        """
+
+        terrain_to_clear = self.get_area_to_clear(list_of_squares)
+        self.mark_open_states(terrain_to_clear)
+        return terrain_to_clear
+
+    def clear_terrain(self, square_coords):
+        """Clears the given square, the empty terrain adjacent to it, and the
+        outline that contains numbers.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened
+        """
+
+        return self.clear_squares([square_coords])
+
+    def open_squares(self, list_of_squares):
+        """Opens a batch of squares, and handles game completion in case of
+        winning or losing. The bombs are checked before anything is opened,
+        so a batch with a bomb only finishes the game.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened (empty if a bomb was in the batch)
+        """
+
+        for square_coords in list_of_squares:
+            if self.is_bomb(square_coords):
+                self.finished = True
+                return []
+
+        cleared_squares = self.clear_squares(list_of_squares)
+        if self.is_game_completed():
+            self.finished = True
+            self.won = True
+
+        if self.debug:
+            self.check_counters()
+        return cleared_squares
+
+    def click_square(self, square_coords):
+        """Handles square left-clicks, and game completion in case of winning
+        or losing by clicking a bomb.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened (empty if a bomb was clicked)
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record('click', square_coords)
+
+        return self.open_squares([square_coords])
+
+    def reveal_squares(self, list_of_squares):
+        """Opens a batch of squares as a single action. Overlapping regions
+        are cleared once, and the game is checked for completion once.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened (empty if a bomb was in the batch)
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record_batch('reveal', list_of_squares)
+
+        return self.open_squares(list_of_squares)
+
+    def chord_square(self, square_coords):
+        """Handles clicks on an opened number: if as many flags as the number
+        are placed next to it, every other unopened neighbour is opened.
+        A wrong flag makes a bomb open and finishes the game.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the squares that
+            were opened (empty if nothing was opened or a bomb was opened)
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record('chord', square_coords)
+
+        row, column = square_coords
+        if self.get_square_state(row, column) != STATES['unblocked'] or not self.is_number(row, column):
+            return []
+
+        neighbours = self.get_neighbours(square_coords)
+        flags = 0
+        squares_to_open = []
+        for neighbour_row, neighbour_column in neighbours:
+            state = self.get_square_state(neighbour_row, neighbour_column)
+            if state == STATES['flagged']:
+                flags += 1
+            elif state != STATES['unblocked']:
+                squares_to_open.append((neighbour_row, neighbour_column))
+
+        if flags != self.numbers[row * self.columns + column] or not squares_to_open:
+            return []
+        return self.open_squares(squares_to_open)
+
+    def place_or_erase_flag_on_square(self, square_coords):
+        """Places or removes an already placed flag on a specific square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the state of the square was changed
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record('flag', square_coords)
+
+        row, column = square_coords
+        state = self.get_square_state(row, column)
+
+        changed = state in [STATES['blocked'], STATES['flagged']]
+        if state == STATES['blocked']:
+            self.set_square_state(row, column, STATES['flagged'])
+        elif state == STATES['flagged']:
+            self.set_square_state(row, column, STATES['blocked'])
+
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def place_or_erase_question_mark_on_square(self, square_coords):
+        """Places or removes an already placed question mark on a specific
+        square.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+
+        Returns
+        ----------
+        bool
+            A bool that represents if the state of the square was changed
+        """
+
+        if self.replay_log is not None:
+            self.replay_log.record('mark', square_coords)
+
+        row, column = square_coords
+        state = self.get_square_state(row, column)
+
+        changed = state in [STATES['blocked'], STATES['marked']]
+        if state == STATES['blocked']:
+            self.set_square_state(row, column, STATES['marked'])
+        elif state == STATES['marked']:
+            self.set_square_state(row, column, STATES['blocked'])
+
+        if self.debug:
+            self.check_counters()
+        return changed
+
+    def time_over(self):
+        """Finishes the game because the time given to play it expired."""
+
+        if self.replay_log is not None:
+            self.replay_log.record('time_over')
+
+        self.finished = True
+
+    def count_flags(self):
+        """Counts placed flags.
+
+        Returns
+        ----------
+        int
+            An integer that represents the number of flags that are currently
+            on the board
+        """
+
+        return self.number_of_placed_flags
+
+    def is_game_completed(self):
+        """Checks if the game is won by checking that every square without a
+        bomb was opened.
+
+        Returns
+        ----------
+        bool
+            A bool representing the state of the game
+            (True = complete, False = incomplete)
+        """
+
+        return self.number_of_unopened_safe_squares == 0
@@ -0,0 +1,189 @@
+"""This module keeps the undo and redo history of a game of minesweeper. An
+action is stored as the list of its state changes, not as a copy of the
+board: the game records every change made by set_square_state as a single
+integer, position * 16 + previous_state * 4 + state, where the position is
+row * columns + column. Undoing or redoing an action sets the states of its
+squares again, so it costs time proportional to the squares it changed, and
+the renderer only redraws those squares. The history is kept below a budget
+of bytes by dropping its oldest actions.
+"""
+
+import sys
+from array import array
+from collections import deque
+
+
+class History:
+    """The actions of a game that can be undone and redone.
+
+    Parameters
+    ----------
+    maximum_bytes : int
+        The number of bytes the stored actions may take; unlimited if None
+    """
+
+    def __init__(self, maximum_bytes=None):
+        self.maximum_bytes = maximum_bytes
+        self.game = None
+        self.undo_entries = deque()
+        self.redo_entries = deque()
+        self.number_of_bytes = 0
+
+    def attach(self, game):
+        """Starts recording the state changes of the given game, dropping the
+        history of the previous one.
+
+        Parameters
+        ----------
+        game : Game
+            The game whose actions will be recorded
+        """
+
+        self.game = game
+        game.state_changes = []
+        self.clear()
+
+    def clear(self):
+        """Drops every stored action and the changes not committed yet."""
+
+        if self.game is not None:
+            self.game.state_changes = []
+        self.undo_entries.clear()
+        self.redo_entries.clear()
+        self.number_of_bytes = 0
+
+    @staticmethod
+    def get_entry_size(entry):
+        """Returns the number of bytes taken by a stored action.
+
+        Parameters
+        ----------
+        entry : tuple
+            A tuple of the array of state changes of the action, and of the
+            finished and won flags of the game after it
+
+        Returns
+        ----------
+        int
+            The number of bytes of the entry
+        """
+
+        return sys.getsizeof(entry) + sys.getsizeof(entry[0])
+
+    def commit(self):
+        """Stores the state changes made since the last commit as a single
+        action, which can then be undone. Making an action drops the actions
+        that were undone.
+
+        Returns
+        ----------
+        bool
+            True if an action was stored, False if nothing changed
+        """
+
+        game = self.game
+        if not game.state_changes:
+            return False
+
+        entry = (array('q', game.state_changes), game.finished, game.won)
+        game.state_changes = []
+
+        for redo_entry in self.redo_entries:
+            self.number_of_bytes -= self.get_entry_size(redo_entry)
+        self.redo_entries.clear()
+
+        self.undo_entries.append(entry)
+        self.number_of_bytes += self.get_entry_size(entry)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Drops the oldest actions until the history fits in its budget.
+        Only actions that can be undone are dropped, because a commit drops
+        the ones that can be redone first."""
+
+        if self.maximum_bytes is None:
+            return
+        while self.number_of_bytes > self.maximum_bytes and self.undo_entries:
+            self.number_of_bytes -= self.get_entry_size(self.undo_entries.popleft())
+
+    def apply_changes(self, changes, undo):
+        """Sets the states of the squares changed by an action, without
+        recording them as a new action.
+
+        Parameters
+        ----------
+        changes : array
+            The state changes of the action, in the order they were made
+        undo : bool
+            If True, the squares get back their previous states, in reverse
+            order; otherwise the changes are made again
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the changed squares
+        """
+
+        game = self.game
+        columns = game.columns
+        state_changes = game.state_changes
+        game.state_changes = None
+
+        changed_squares = []
+        for change in (reversed(changes) if undo else changes):
+            row, column = divmod(change >> 4, columns)
+            state = (change >> 2) & 3 if undo else change & 3
+            game.set_square_state(row, column, state)
+            changed_squares.append((row, column))
+
+        game.state_changes = state_changes
+        if game.debug:
+            game.check_counters()
+        return changed_squares
+
+    def undo(self):
+        """Undoes the last action, unless the game is finished.
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the changed squares,
+            empty if there was nothing to undo
+        """
+
+        game = self.game
+        if not self.undo_entries or game.finished or game.state_changes:
+            return []
+
+        if game.replay_log is not None:
+            game.replay_log.record('undo')
+
+        entry = self.undo_entries.pop()
+        self.redo_entries.append(entry)
+        return self.apply_changes(entry[0], True)
+
+    def redo(self):
+        """Makes the last undone action again, finishing the game if the
+        action finished it.
+
+        Returns
+        ----------
+        list
+            A list of tuples representing coordinates of the changed squares,
+            empty if there was nothing to redo
+        """
+
+        game = self.game
+        if not self.redo_entries or game.finished or game.state_changes:
+            return []
+
+        if game.replay_log is not None:
+            game.replay_log.record('redo')
+
+        changes, finished, won = self.redo_entries.pop()
+        self.undo_entries.append((changes, finished, won))
+        changed_squares = self.apply_changes(changes, False)
+        game.finished = finished
+        game.won = won
+        return changed_squares
@@ -2,26 +2,32 @@
 bombs and time in a tkinter window.
 """
 
-import time as t
-import random
+import os
 from tkinter import *
-from threading import Thread, Event
-from time import perf_counter
 
-WINDOW = Tk()
-CANVAS = Canvas(WINDOW)
-TIMER_ENTRY = Entry()
-TIMER_THREAD = Thread()
+from clock import GameClock
+from engine import Game, STATES
+from history import History
+from metrics import LatencyRecorder
+from noguess import NoGuessGame
+from pool import LayoutPool
+from renderer import ImageRenderer, ViewportRenderer
+from replay import record
+from savegame import load_game, save_game
+
+WINDOW = None
+BOARD_FRAME = None
+CANVAS = None
+HORIZONTAL_SCROLLBAR = None
+VERTICAL_SCROLLBAR = None
+TIMER_ENTRY = None
 TIME_LEFT = 0
-TIME_TO_WAIT = 0
-TIME_LABEL = Label()
-THREAD_STOP = Event()
-THREAD_STOP.clear()
-REMAINING_FLAGS_LABEL = Label()
-
-BOMBS = []
-MATRIX_OF_STATES = []
-NUMBERS = []
+TIME_LABEL = None
+CLOCK = None
+REMAINING_FLAGS_LABEL = None
+NO_GUESS = None
+
+GAME = Game(8, 8, 10)
 IN_GAME = False
 GAME_FINISHED = False
 
@@ -31,55 +37,18 @@ COLORS = {'bg': '#6e8583', 'blocked-square-even': '#006D64', 'blocked-square-odd
 CONSTANTS = {'number_of_rows': 8, 'number_of_columns': 8, 'number_of_bombs': 10, 'flag': '🚩', 'bomb': '💣',
              'question_mark': '?',
              'canvas_padding': 100, 'square_size': 20, 'header_height': 40, 'number_of_placed_flags': 0,
-             'popup_height': 70, 'popup_width': 300, 'entry_width': 4, 'maximum_board_size': 30,
-             'minimum_board_size': 4, 'maximum_number_of_seconds': 1000}
-
-STATES = {'blocked': 0, 'unblocked': 1, 'flagged': 2, 'marked': 3}
-
-
-def stop_thread():
-    """Stops the global timer thread called TIMER_THREAD."""
-
-    global THREAD_STOP
-    THREAD_STOP.set()
-    if TIMER_THREAD.is_alive():
-        TIMER_THREAD.join()
+             'popup_height': 70, 'popup_width': 300, 'entry_width': 4, 'maximum_board_size': 1000,
+             'minimum_board_size': 4, 'maximum_number_of_seconds': 1000, 'viewport_size': 600,
+             'viewport_margin': 2, 'replay_file': 'last_game.msr', 'pooled_layouts': 2,
+             'minimum_pooled_number_of_squares': 40000, 'latency_records': 512, 'latency_file': 'latency.json',
+             'undo_budget': 16 * 1024 * 1024, 'save_file': 'saved_game.mss', 'image_renderer': False}
 
-
-def update_seconds():
-    """Updates the second inside the global label for seconds called TIME_LABEL
-    in a loop while the thread is still running."""
-
-    global TIME_LEFT, THREAD_STOP
-    start_time = perf_counter()
-
-    while not THREAD_STOP.is_set():
-        current_time = perf_counter()
-        difference = int(current_time - start_time)
-        TIME_LEFT = TIME_TO_WAIT - difference
-        refresh_time_label()
-        if TIME_LEFT <= 0:
-            show_time_over_popup()
-            break
-        t.sleep(1)
-
-
-def start_timer(time):
-    """Starts a timer on a new thread for 'time' seconds.
-
-    Parameters
-    ----------
-    time : int
-        Time in seconds
-    """
-
-    global TIMER_THREAD, TIME_TO_WAIT, THREAD_STOP
-
-    THREAD_STOP.clear()
-
-    TIME_TO_WAIT = time
-    TIMER_THREAD = Thread(target=update_seconds, daemon=True)
-    TIMER_THREAD.start()
+RENDERER = None
+LAYOUT_POOL = LayoutPool(CONSTANTS['pooled_layouts'])
+LATENCY = None
+HISTORY = History(CONSTANTS['undo_budget'])
+OVERLAY_LABEL = None
+OVERLAY_SHOWN = False
 
 
 def update_custom_difficulty_and_restart(rows, columns, number_of_bombs):
@@ -99,7 +68,7 @@ def update_custom_difficulty_and_restart(rows, columns, number_of_bombs):
 
     global IN_GAME
 
-    stop_thread()
+    CLOCK.stop()
 
     if IN_GAME:
         reset_game()
@@ -108,7 +77,7 @@ def update_custom_difficulty_and_restart(rows, columns, number_of_bombs):
         if is_valid_time(TIMER_ENTRY.get()):
             time = get_number(TIMER_ENTRY.get())
         if time != 0:
-            start_timer(time)
+            CLOCK.start(time)
 
     else:
         time = 0
@@ -126,7 +95,7 @@ def update_custom_difficulty_and_restart(rows, columns, number_of_bombs):
                 update_board()
 
                 if time != 0:
-                    start_timer(time)
+                    CLOCK.start(time)
 
 
 def get_square_from_coords(x, y):
@@ -146,7 +115,8 @@ def get_square_from_coords(x, y):
 
 def click_on_canvas(event):
     """Handles board left-clicks. They either start a new round or get handles
-    in another function, if that square is not flagged as a bomb.
+    in another function, if that square is not flagged as a bomb. Clicks on
+    opened numbers chord.
 
     Parameters
     ----------
@@ -166,10 +136,75 @@ def click_on_canvas(event):
             IN_GAME = True
             GAME_FINISHED = False
             start_round(square_coords)
-        elif MATRIX_OF_STATES[square_coords[0]][square_coords[1]] != STATES['flagged']:
+        elif GAME.get_square_state(*square_coords) == STATES['unblocked']:
+            chord_square(square_coords)
+        elif GAME.get_square_state(*square_coords) != STATES['flagged']:
             click_square(square_coords)
 
 
+def record_latency(action, handler):
+    """Wraps an input handler so that the latency of its action is recorded,
+    from the event until its changes are painted.
+
+    Parameters
+    ----------
+    action : str
+        The name of the action
+    handler : callable
+        The input handler
+
+    Returns
+    ----------
+    callable
+        The wrapped handler
+    """
+
+    def recorded_handler(event):
+        LATENCY.start(action)
+        handler(event)
+        if not RENDERER.flush_scheduled:
+            LATENCY.finish()
+
+    return recorded_handler
+
+
+def toggle_overlay(event=None):
+    """Shows or hides the overlay with the latency percentiles.
+
+    Parameters
+    ----------
+    event : Event
+        The key event
+    """
+
+    global OVERLAY_SHOWN
+    OVERLAY_SHOWN = not OVERLAY_SHOWN
+    if OVERLAY_SHOWN:
+        OVERLAY_LABEL.pack(side=LEFT)
+        refresh_overlay()
+    else:
+        OVERLAY_LABEL.pack_forget()
+
+
+def refresh_overlay():
+    """Refreshes the text of the overlay, if it is shown."""
+
+    if OVERLAY_SHOWN:
+        OVERLAY_LABEL.config(text=LATENCY.format_summary())
+
+
+def dump_latency(event=None):
+    """Writes the recorded latencies to the latency file.
+
+    Parameters
+    ----------
+    event : Event
+        The key event
+    """
+
+    LATENCY.dump(CONSTANTS['latency_file'])
+
+
 def place_flag(event):
     """Calls the function to place or remove flag on the computed square from
     the given coordinates.
@@ -221,16 +256,10 @@ def place_or_erase_question_mark_on_square(square_coords):
         Tuple that represents the coordinates of the square on the board
     """
 
-    row, column = square_coords
-    global CONSTANTS
-
-    if MATRIX_OF_STATES[row][column] == STATES['blocked']:
-        paint_text_inside_square(CONSTANTS['question_mark'], row, column)
-        MATRIX_OF_STATES[row][column] = STATES['marked']
-
-    elif MATRIX_OF_STATES[row][column] == STATES['marked']:
-        erase_mark(row, column)
-        MATRIX_OF_STATES[row][column] = STATES['blocked']
+    with LATENCY.measure_engine():
+        GAME.place_or_erase_question_mark_on_square(square_coords)
+    HISTORY.commit()
+    RENDERER.schedule_flush()
 
 
 def place_or_erase_flag_on_square(square_coords):
@@ -242,74 +271,62 @@ def place_or_erase_flag_on_square(square_coords):
         Tuple that represents the coordinates of the square on the board
     """
 
-    row, column = square_coords
-    global CONSTANTS
+    with LATENCY.measure_engine():
+        GAME.place_or_erase_flag_on_square(square_coords)
+    HISTORY.commit()
+    RENDERER.schedule_flush()
+    refresh_flag_label()
 
-    if MATRIX_OF_STATES[row][column] == STATES['blocked']:
-        paint_text_inside_square(CONSTANTS['flag'], row, column)
-        MATRIX_OF_STATES[row][column] = STATES['flagged']
-        CONSTANTS['number_of_placed_flags'] += 1
 
-    elif MATRIX_OF_STATES[row][column] == STATES['flagged']:
-        CONSTANTS['number_of_placed_flags'] -= 1
-        erase_mark(row, column)
-        MATRIX_OF_STATES[row][column] = STATES['blocked']
+def undo(event=None):
+    """Undoes the last action of the round, redrawing only the squares it
+    changed.
 
-    refresh_flag_label()
+    Parameters
+    ----------
+    event : Event
+        The key event
+    """
 
+    if IN_GAME and not GAME_FINISHED:
+        with LATENCY.measure_engine():
+            changed_squares = HISTORY.undo()
+        if changed_squares:
+            RENDERER.schedule_flush()
+            refresh_flag_label()
 
-def count_flags():
-    """Counts placed flags.
 
-    Returns
+def redo(event=None):
+    """Makes the last undone action of the round again, redrawing only the
+    squares it changed.
+
+    Parameters
     ----------
-    int
-        An integer that represents the number of flags that are currently on
-        the board
+    event : Event
+        The key event
     """
 
-    count = 0
-    for row in MATRIX_OF_STATES:
-        for state in row:
-            if state == STATES['flagged']:
-                count += 1
-    return count
+    if IN_GAME and not GAME_FINISHED:
+        with LATENCY.measure_engine():
+            changed_squares = HISTORY.redo()
+        if changed_squares:
+            show_opened_squares()
 
 
 def refresh_flag_label():
     """Refreshes flag label according to the current placed flags."""
 
     global CONSTANTS, REMAINING_FLAGS_LABEL
-    CONSTANTS['number_of_placed_flags'] = count_flags()
+    CONSTANTS['number_of_placed_flags'] = GAME.number_of_placed_flags
     number_of_remaining_flags = CONSTANTS['number_of_bombs'] - CONSTANTS['number_of_placed_flags']
     flags = CONSTANTS['flag']
     REMAINING_FLAGS_LABEL.config(text=flags + ": " + str(number_of_remaining_flags))
 
 
-def erase_mark(row, column):
-    """Erases any mark from a blocked square.
-
-    Parameters
-    ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-    """
-
-    even_color = COLORS['blocked-square-even']
-    odd_color = COLORS['blocked-square-odd']
-
-    paint_square(row, column, even_color, odd_color)
-
-
 def show_all_bombs():
     """Paints all bombs on top."""
 
-    for bomb in BOMBS:
-        row, column = bomb
-        erase_mark(row, column)
-        paint_text_inside_square(CONSTANTS['bomb'], row, column)
+    RENDERER.show_bombs()
 
 
 def click_square(square_coords):
@@ -322,34 +339,42 @@ def click_square(square_coords):
         Tuple that represents the coordinates of the square on the board
     """
 
-    if square_coords in BOMBS:
-        show_all_bombs()
-        show_game_over_popup()
-    else:
-        clear_terrain(square_coords)
-        if is_game_completed():
-            show_all_bombs()
-            show_winning_popup()
+    with LATENCY.measure_engine():
+        GAME.click_square(square_coords)
+    HISTORY.commit()
+    show_opened_squares()
 
 
-def is_game_completed():
-    """Checks if the game is won by counting blocked position.
+def chord_square(square_coords):
+    """Handles left-clicks on opened numbers, which open every unflagged
+    neighbour when the flags around the number match it.
 
-    Returns
+    Parameters
     ----------
-    bool
-        A bool representing the state of the game
-        (True = complete, False = incomplete)
+    square_coords : tuple
+        Tuple that represents the coordinates of the square on the board
     """
 
-    number_of_unopened_squares = 0
-    for i in range(len(MATRIX_OF_STATES)):
-        for j in range(len(MATRIX_OF_STATES[0])):
-            if MATRIX_OF_STATES[i][j] in [STATES['blocked'], STATES['flagged']]:
-                number_of_unopened_squares += 1
-    if number_of_unopened_squares == len(BOMBS):
-        return True
-    return False
+    with LATENCY.measure_engine():
+        opened_squares = GAME.chord_square(square_coords)
+    HISTORY.commit()
+    if opened_squares or GAME.finished:
+        show_opened_squares()
+
+
+def show_opened_squares():
+    """Paints the squares opened by the last action in a single redraw, and
+    handles game completion in case of winning or losing."""
+
+    if GAME.finished and not GAME.won:
+        show_all_bombs()
+        show_game_over_popup()
+    else:
+        RENDERER.schedule_flush()
+        refresh_flag_label()
+        if GAME.won:
+            show_all_bombs()
+            show_winning_popup()
 
 
 def center_window(win, height, width):
@@ -378,7 +403,10 @@ def show_winning_popup():
     """Calls the popup loader with the appropriate message after winning the
     game."""
 
-    show_popup("YOU WIN!")
+    if CLOCK.elapsed_milliseconds:
+        show_popup(f"YOU WIN! ({CLOCK.elapsed_milliseconds / 1000:.3f} s)")
+    else:
+        show_popup("YOU WIN!")
 
 
 def show_popup(finishing_message):
@@ -393,6 +421,8 @@ def show_popup(finishing_message):
 
     global GAME_FINISHED
     GAME_FINISHED = True
+    CLOCK.pause()
+    save_replay()
 
     win = Toplevel(WINDOW)
     geometry = str(CONSTANTS['popup_height']) + 'x' + str(CONSTANTS['popup_width'])
@@ -408,6 +438,14 @@ def show_popup(finishing_message):
     restart.pack(side="bottom")
 
 
+def save_replay():
+    """Writes the replay log of the current game to the replay file, so the
+    game can be reproduced without a display."""
+
+    with open(CONSTANTS['replay_file'], 'wb') as file:
+        file.write(GAME.replay_log.to_bytes())
+
+
 def show_game_over_popup():
     """Calls the popup loader with the appropriate message after losing the
     game."""
@@ -415,528 +453,278 @@ def show_game_over_popup():
     show_popup("GAME OVER!")
 
 
-def reset_and_close_window(win):
-    """Resets the current window and resets game values.
+def save_current_game(event=None):
+    """Writes the game in progress to the save file, with the time played so
+    far.
 
     Parameters
     ----------
-    win : Window
-        The window that will de refreshed
+    event : Event
+        The key event
     """
 
-    win.destroy()
-    reset_game()
+    if IN_GAME and not GAME_FINISHED:
+        save_game(GAME, CONSTANTS['save_file'], CLOCK.elapsed_milliseconds, CLOCK.total_seconds)
 
 
-def reset_game():
-    """Resets game values and updates the board."""
-
-    global IN_GAME, GAME_FINISHED
-    IN_GAME = False
-    GAME_FINISHED = False
-
-    init_values(CONSTANTS['number_of_rows'], CONSTANTS['number_of_columns'], CONSTANTS['number_of_bombs'])
-    update_board()
-
-
-def start_round(square_coords):
-    """Initializes the round values, generates bombs and square numbers, clears terrain from clicked square.
+def resume_saved_game(event=None):
+    """Replaces the current game with the one in the save file, and starts
+    the clock from the time played before it was saved.
 
     Parameters
     ----------
-    square_coords : tuple
-        Tuple that represents the coordinates of the square on the board
+    event : Event
+        The key event
     """
 
-    init_matrix_state()
-    generate_bombs(square_coords)
-    generate_numbers()
-    clear_terrain(square_coords)
-
+    global IN_GAME, GAME_FINISHED
 
-def generate_numbers():
-    """Computes the number of bombs neighbouring each square and stores them
-    globally."""
+    if GAME_FINISHED or not os.path.exists(CONSTANTS['save_file']):
+        return
 
-    global NUMBERS
-    NUMBERS = []
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
+    game, elapsed_milliseconds, total_seconds = load_game(CONSTANTS['save_file'])
+    CLOCK.stop()
+    NO_GUESS.set(game.mode == 'no_guess')
+    IN_GAME = True
+    GAME_FINISHED = False
 
-    for i in range(rows):
-        row_of_numbers = []
-        for j in range(columns):
-            number_of_bombs = get_number_of_bombs_next_to_coords(i, j)
-            if (i, j) in BOMBS:
-                row_of_numbers.append('X')
-            else:
-                row_of_numbers.append(number_of_bombs)
-        NUMBERS.append(row_of_numbers)
+    init_values(game.rows, game.columns, game.number_of_bombs, game)
+    update_board()
+    CLOCK.start(total_seconds, elapsed_milliseconds / 1000)
 
 
-def get_number_of_bombs_next_to_coords(row, column):
-    """Computes the number of bombs next to a given square.
+def reset_and_close_window(win):
+    """Resets the current window and resets game values.
 
     Parameters
     ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-
-    Returns
-    ----------
-    int
-        An integer that represents the number of bombs adjacent to the given
-        square
+    win : Window
+        The window that will de refreshed
     """
 
-    number_of_bombs = 0
-    for i in [-1, 0, 1]:
-        for j in [-1, 0, 1]:
-            neighbour_coords = row + i, column + j
-            if is_inside_matrix(neighbour_coords) and neighbour_coords in BOMBS:
-                number_of_bombs += 1
-    return number_of_bombs
-
-
-def init_matrix_state():
-    """Initializes all matrix square states to 'blocked'."""
-
-    global MATRIX_OF_STATES
-    MATRIX_OF_STATES = []
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
-
-    for i in range(rows):
-        row_states = []
-        for j in range(columns):
-            row_states.append(STATES['blocked'])
-        MATRIX_OF_STATES.append(row_states)
-
+    win.destroy()
+    reset_game()
 
-def is_inside_matrix(coords):
-    """Checks if coordinates are not out of matrix bounds.
 
-    Parameters
-    ----------
-    coords : tuple
-        Tuple that represents the coordinates a square that may be on the
-        board
-
-    Returns
-    ----------
-    bool
-        A bool showing if the given square coordinates are inside the board
-        (True = inside the board, False = invalid square)
-    """
+def reset_game():
+    """Resets game values and updates the board."""
 
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
+    global IN_GAME, GAME_FINISHED
+    IN_GAME = False
+    GAME_FINISHED = False
 
-    row, column = coords
-    if row < 0 or column < 0 or row > rows-1 or column > columns-1:
-        return False
-    return True
+    init_values(CONSTANTS['number_of_rows'], CONSTANTS['number_of_columns'], CONSTANTS['number_of_bombs'])
+    update_board()
 
 
-def get_neighbours(coords):
-    """Returns neighbouring squares for a given square.
+def start_round(square_coords):
+    """Starts the round from the clicked square and paints the cleared terrain.
+    The clock starts measuring the round, unless a countdown already runs.
 
     Parameters
     ----------
-    coords : tuple
+    square_coords : tuple
         Tuple that represents the coordinates of the square on the board
-
-    Returns
-    ----------
-    list
-        A list of tuples representing coordinates of squares that are
-        adjacent to the given square
-    """
-
-    neighbours = []
-    for i in [-1, 0, 1]:
-        for j in [-1, 0, 1]:
-            neighbour = (coords[0] + i, coords[1] + j)
-            if is_inside_matrix(neighbour):
-                neighbours.append(neighbour)
-    return neighbours
-
-
-def get_new_empty_neighbours(visited, current_coords):
-    """Returns unvisited horizontally or vertically linked squares with zero
-    bombs as neighbours to a given one.
-
-    Parameters
-    ----------
-    visited : list
-        A list of already checked squares
-    current_coords : tuple
-        A tuple that represents the coordinates of the square on the board
-
-    Return
-    ----------
-    list
-        A list of tuples representing coordinates of squares that are adjacent
-        to zero bombs, are not found inside the visited list, and are also
-        adjacent to the given square
-    """
-
-    empty_neighbours = []
-    for i, j in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
-        neighbour_coords = current_coords[0] + i, current_coords[1] + j
-        if is_inside_matrix(neighbour_coords):
-            if neighbour_coords not in BOMBS and neighbour_coords not in visited and \
-                    NUMBERS[neighbour_coords[0]][neighbour_coords[1]] == 0:
-                empty_neighbours.append(neighbour_coords)
-
-    return empty_neighbours
-
-
-def paint_square(row, column, even_color, odd_color):
-    """Paints a square by matrix indexes with one of the two colors,
-    resembling a chessboard.
-
-    Parameters
-    ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-    even_color : str
-        A string representing the color for the squares with even sum of
-        indexes
-    odd_color : str
-        A string representing the color for the squares with odd sum of
-        indexes
-    """
-
-    square_size = CONSTANTS['square_size']
-    if (row + column) % 2 == 0:
-        CANVAS.create_rectangle(column * square_size, row * square_size,
-                                (column + 1) * square_size, (row + 1) * square_size, fill=even_color)
-    else:
-        CANVAS.create_rectangle(column * square_size, row * square_size,
-                                (column + 1) * square_size, (row + 1) * square_size, fill=odd_color)
-
-
-def get_square_number(row, column):
-    """Returns the number of bomb neighbours for a given square.
-
-    Parameters
-    ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-
-    Returns
-    ---------
-    int
-        An integer representing the number of bombs adjacent to the given
-        square
-    """
-
-    return NUMBERS[row][column]
-
-
-def paint_text_inside_square(text, row, column):
-    """Paints the given text inside a square given by index.
-
-    Parameters
-    ----------
-    text : int
-        The text that will be painted inside the given square
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-
-    Returns
-    ---------
-    int
-        An integer representing the number of bombs adjacent to the given
-        square
     """
 
-    square_size = CONSTANTS['square_size']
-    CANVAS.create_text(column * square_size + square_size / 2, row * square_size + square_size / 2, text=str(text))
-
-
-def mark_open_states(list_of_squares):
-    """Marks a list of squares as 'open' in the matrix of states.
-
-    Parameters
-    ----------
-    list_of_squares : list
-        The list of squares that will be unblocked logically
-    """
-
-    for row, column in list_of_squares:
-        MATRIX_OF_STATES[row][column] = STATES['unblocked']
-
-
-def clear_squares(list_of_squares):
-    """Clears a list of squares visually and in the matrix of states.
-
-    Parameters
-    ----------
-    list_of_squares : list
-        The list of squares that will be unblocked visually and logically
-    """
-
-    mark_open_states(list_of_squares)
-
-    even_color = COLORS['open-square-even']
-    odd_color = COLORS['open-square-odd']
-
-    for square in list_of_squares:
-        row, column = square
-        paint_square(row, column, even_color, odd_color)
-        number = get_square_number(row, column)
-        if number != 0:
-            paint_text_inside_square(number, row, column)
+    if not CLOCK.running:
+        CLOCK.start(0)
+    with LATENCY.measure_engine():
+        GAME.start_round(square_coords)
+    HISTORY.clear()
+    RENDERER.schedule_flush()
+    refresh_flag_label()
 
 
-def get_adjacent_empty_terrain(coords):
-    """Returns terrain with zero bombs as neighbours, that is adjacent to the
-    given square.
+def create_game(rows, columns, number_of_bombs):
+    """Creates a game in the selected mode. For large boards and in no-guess
+    mode, a layout generated in advance is used when one is ready, and more
+    are generated in the background for the next games.
 
     Parameters
     ----------
-    coords : tuple
-        Tuple that represents the coordinates of the square on the board
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the board
 
     Returns
     ----------
-    list
-        A list of tuples representing coordinates of squares that are adjacent
-        to zero bombs and are linked to the given square
+    Game
+        The new game
     """
 
-    q = [coords]
-    index = 0
+    game_class = NoGuessGame if NO_GUESS.get() else Game
+    if game_class is Game and rows * columns < CONSTANTS['minimum_pooled_number_of_squares']:
+        return game_class(rows, columns, number_of_bombs)
 
-    while index < len(q):
-        current_coords = q[index]
-        neighbors = get_new_empty_neighbours(q, current_coords)
-        q.extend(neighbors)
-        index += 1
+    LAYOUT_POOL.configure(game_class, rows, columns, number_of_bombs)
+    pooled_layout = LAYOUT_POOL.take()
+    LAYOUT_POOL.fill()
+    if pooled_layout is None:
+        return game_class(rows, columns, number_of_bombs)
 
-    return q
+    seed, layout, layout_numbers = pooled_layout
+    game = game_class(rows, columns, number_of_bombs, seed=seed)
+    game.layout = layout
+    game.layout_numbers = layout_numbers
+    return game
 
 
-def get_adjacent_numbers(terrain):
-    """Returns the list of squares that represents the outline with numbers of
-    an empty terrain.
+def init_values(rows, columns, number_of_bombs, game=None):
+    """Initializes board and window constants according to the given
+    parameters.
 
     Parameters
     ----------
-    terrain : list
-        A list of tuples representing coordinates of squares linked to each
-        other and having zero bombs adjacent to them
-
-    Returns
-    ----------
-    list
-        A list of tuples representing coordinates of squares that are adjacent
-        to the terrain, and to minimum one bomb, and that are not bombs
+    rows : int
+        The number of rows that the board will be updated to show
+    columns : int
+        The number of rows that the board will be updated to show
+    number_of_bombs : int
+        The number of bombs that the round will be updated to have
+    game : Game
+        A resumed game that is shown instead of a new one
     """
 
-    adjacent_squares = []
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
-
-    for row in range(rows):
-        for column in range(columns):
-            is_adjacent = False
-            for i in [-1, 0, 1]:
-                for j in [-1, 0, 1]:
-                    coords = row + i, column + j
-                    if coords in terrain and (row, column) not in terrain:
-                        is_adjacent = True
-                        break
-                if is_adjacent:
-                    break
-
-            if is_adjacent and (row, column) not in BOMBS:
-                if is_only_diagonally_linked(row, column, terrain) and is_number(row, column):
-                    adjacent_squares.append((row, column))
+    global CONSTANTS, GAME
 
-    return adjacent_squares
-
-
-def is_only_diagonally_linked(row, column, terrain):
-    """Checks if a given square is only diagonally linked to a terrain or not.
+    CONSTANTS['number_of_rows'] = rows
+    CONSTANTS['number_of_columns'] = columns
+    CONSTANTS['number_of_bombs'] = number_of_bombs
+    if game is None:
+        GAME = create_game(rows, columns, number_of_bombs)
+        record(GAME)
+    else:
+        GAME = game
+    RENDERER.attach(GAME)
+    HISTORY.attach(GAME)
 
-    Parameters
-    ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
-    terrain : list
-        A list of tuples representing coordinates of squares linked to each
-        other and having zero bombs adjacent to them
+    viewport_width, viewport_height = get_viewport_size()
+    window_width = viewport_width + CONSTANTS['canvas_padding'] * 2
+    window_height = viewport_height + CONSTANTS['canvas_padding'] * 2
+    WINDOW.title('Minesweeper')
 
-    Returns
-    ----------
-    bool
-        A bool that represents if a given square is only diagonally linked to
-        the given terrain
-    """
+    center_window(WINDOW, window_height, window_width)
 
-    for i, j in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
-        coords = (row + i, column + j)
-        if coords not in terrain:
-            return True
-    return False
+    WINDOW.resizable(False, False)
+    bg_color = COLORS['bg']
+    WINDOW.configure(bg=bg_color)
 
+    refresh_flag_label()
 
-def is_number(row, column):
-    """Checks if a given square as a number of adjacent bombs, that is grater
-    that 0.
 
-    Parameters
-    ----------
-    row : int
-        The row of a square inside the board
-    column : int
-        The column of a square inside the board
+def get_viewport_size():
+    """Computes the size of the visible part of the board, which is the
+    whole board unless it is larger than the maximum viewport size.
 
     Returns
     ----------
-    bool
-        A bool that represents if the given square is adjacent to minimum one
-        bomb
-        (True = is adjacent to minimum one bomb, False = is adjacent to zero bombs)
+    tuple
+        A tuple of two integers, the width and the height of the viewport in
+        pixels
     """
 
-    return NUMBERS[row][column] in range(1, 9)
+    board_width = CONSTANTS['number_of_columns'] * CONSTANTS['square_size']
+    board_height = CONSTANTS['number_of_rows'] * CONSTANTS['square_size']
+    return min(board_width, CONSTANTS['viewport_size']), min(board_height, CONSTANTS['viewport_size'])
 
 
-def clear_terrain(square_coords):
-    """Clears the given square, the empty terrain adjacent to it, and the
-    outline that contains numbers.
+def scroll_horizontally(first, last):
+    """Updates the horizontal scrollbar and the visible squares after the
+    board was scrolled.
 
     Parameters
     ----------
-    square_coords : tuple
-        Tuple that represents the coordinates of the square on the board
+    first : str
+        The fraction of the board width left of the viewport
+    last : str
+        The fraction of the board width up to the right side of the viewport
     """
 
-    terrain_to_clear = [square_coords]
+    HORIZONTAL_SCROLLBAR.set(first, last)
+    RENDERER.update_viewport()
 
-    if NUMBERS[square_coords[0]][square_coords[1]] == 0:
-        empty_terrain = get_adjacent_empty_terrain(square_coords)
-        adjacent_numbers = get_adjacent_numbers(empty_terrain)
 
-        terrain_to_clear.extend(empty_terrain)
-        terrain_to_clear.extend(adjacent_numbers)
-
-    clear_squares(terrain_to_clear)
-    refresh_flag_label()
-
-
-def generate_bombs(square_coords):
-    """Generates bombs random inside the matrix, but not on the given square
-    or its neighbours.
+def scroll_vertically(first, last):
+    """Updates the vertical scrollbar and the visible squares after the
+    board was scrolled.
 
     Parameters
     ----------
-    square_coords : tuple
-        Tuple that represents the coordinates of the square on the board
+    first : str
+        The fraction of the board height above the viewport
+    last : str
+        The fraction of the board height up to the bottom of the viewport
     """
 
-    global BOMBS
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
-    all_possible_positions = [(i, j) for i in range(rows) for j in range(columns)]
-    all_possible_positions.remove(square_coords)
-
-    row, column = square_coords
-    for i in [-1, 0, 1]:
-        for j in [-1, 0, 1]:
-            coords = row + i, column + j
-            if coords in all_possible_positions:
-                all_possible_positions.remove(coords)
-
-    number_of_bombs = CONSTANTS['number_of_bombs']
-    BOMBS = random.sample(list(set(all_possible_positions)), k=number_of_bombs)
+    VERTICAL_SCROLLBAR.set(first, last)
+    RENDERER.update_viewport()
 
 
-def init_values(rows, columns, number_of_bombs):
-    """Initializes board and window constants according to the given
-    parameters.
+def scroll_with_mouse_wheel(event):
+    """Scrolls the board vertically with the mouse wheel.
 
     Parameters
     ----------
-    rows : int
-        The number of rows that the board will be updated to show
-    columns : int
-        The number of rows that the board will be updated to show
-    number_of_bombs : int
-        The number of bombs that the round will be updated to have
+    event : Event
+        The mouse wheel event on the board
     """
 
-    global CONSTANTS
-
-    CONSTANTS['number_of_rows'] = rows
-    CONSTANTS['number_of_columns'] = columns
-    CONSTANTS['number_of_bombs'] = number_of_bombs
-
-    window_width = CONSTANTS['square_size'] * columns + CONSTANTS['canvas_padding'] * 2
-    window_height = CONSTANTS['square_size'] * rows + CONSTANTS['canvas_padding'] * 2
-    WINDOW.title('Minesweeper')
-
-    center_window(WINDOW, window_height, window_width)
-
-    WINDOW.resizable(False, False)
-    bg_color = COLORS['bg']
-    WINDOW.configure(bg=bg_color)
-
-    refresh_flag_label()
+    CANVAS.yview_scroll(-1 if event.delta > 0 else 1, 'units')
 
 
 def init_board():
     """Initializes board sizes according to the constants, and attaches
     buttons to the board."""
 
-    canvas_width = CONSTANTS['number_of_columns'] * CONSTANTS['square_size']
-    canvas_height = CONSTANTS['number_of_rows'] * CONSTANTS['square_size']
-    CANVAS.config(width=canvas_width, height=canvas_height)
+    BOARD_FRAME.place(relx=0.5, rely=0.5, anchor=CENTER)
+    CANVAS.grid(row=0, column=0)
+    CANVAS.config(xscrollcommand=scroll_horizontally, yscrollcommand=scroll_vertically,
+                  xscrollincrement=CONSTANTS['square_size'], yscrollincrement=CONSTANTS['square_size'])
+    CANVAS.bind("<Button-1>", record_latency('click', click_on_canvas))
+    CANVAS.bind("<Button-2>", record_latency('mark', place_question_mark))
+    CANVAS.bind("<Button-3>", record_latency('flag', place_flag))
+    WINDOW.bind("<F3>", toggle_overlay)
+    WINDOW.bind("<F4>", dump_latency)
+    WINDOW.bind("<Control-z>", record_latency('undo', undo))
+    WINDOW.bind("<Control-y>", record_latency('redo', redo))
+    WINDOW.bind("<Control-s>", save_current_game)
+    WINDOW.bind("<Control-o>", resume_saved_game)
+    CANVAS.bind("<MouseWheel>", scroll_with_mouse_wheel)
 
-    CANVAS.grid(row=1, column=0)
-    CANVAS.place(relx=0.5, rely=0.5, anchor=CENTER)
-    CANVAS.bind("<Button-1>", click_on_canvas)
-    CANVAS.bind("<Button-2>", place_question_mark)
-    CANVAS.bind("<Button-3>", place_flag)
-
-    paint_squares()
+    update_board()
 
 
 def paint_squares():
     """Paints all the squares as blocked with tho colors, in a chessboard
-    pattern."""
-
-    rows = CONSTANTS['number_of_rows']
-    columns = CONSTANTS['number_of_columns']
-    even_color = COLORS['blocked-square-even']
-    odd_color = COLORS['blocked-square-odd']
+    pattern. The canvas items are reused if the board size did not change."""
 
-    for i in range(rows):
-        for j in range(columns):
-            paint_square(i, j, even_color, odd_color)
+    RENDERER.reset(CONSTANTS['number_of_rows'], CONSTANTS['number_of_columns'])
 
 
 def update_board():
-    """Resizes the board."""
+    """Resizes the board and its viewport, showing the scrollbars only if
+    the board does not fit inside the viewport."""
+
+    board_width = CONSTANTS['number_of_columns'] * CONSTANTS['square_size']
+    board_height = CONSTANTS['number_of_rows'] * CONSTANTS['square_size']
+    viewport_width, viewport_height = get_viewport_size()
+    CANVAS.config(width=viewport_width, height=viewport_height, scrollregion=(0, 0, board_width, board_height))
+    CANVAS.xview_moveto(0)
+    CANVAS.yview_moveto(0)
+
+    if board_width > viewport_width:
+        HORIZONTAL_SCROLLBAR.grid(row=1, column=0, sticky='we')
+    else:
+        HORIZONTAL_SCROLLBAR.grid_remove()
+    if board_height > viewport_height:
+        VERTICAL_SCROLLBAR.grid(row=0, column=1, sticky='ns')
+    else:
+        VERTICAL_SCROLLBAR.grid_remove()
 
-    canvas_width = CONSTANTS['number_of_columns'] * CONSTANTS['square_size']
-    canvas_height = CONSTANTS['number_of_rows'] * CONSTANTS['square_size']
-    CANVAS.config(width=canvas_width, height=canvas_height)
-    CANVAS.delete("all")
     paint_squares()
 
 
@@ -1036,6 +824,21 @@ def is_valid_time(time):
         return False
 
 
+def update_time_left(seconds_left):
+    """Shows the number of seconds left, called by the clock whenever it
+    changes.
+
+    Parameters
+    ----------
+    seconds_left : int
+        The number of seconds left
+    """
+
+    global TIME_LEFT
+    TIME_LEFT = seconds_left
+    refresh_time_label()
+
+
 def refresh_time_label():
     """Refreshes the text inside the time label."""
 
@@ -1046,6 +849,7 @@ def show_time_over_popup():
     """Calls the popup loader with the appropriate message after time has
     expired."""
 
+    GAME.time_over()
     show_popup("TIME OVER! GAME OVER!")
 
 
@@ -1064,13 +868,14 @@ def init_header():
     columns_entry = Entry(header, width=CONSTANTS['entry_width'])
     bombs_label = Label(header, text="Bombs:")
     bombs_entry = Entry(header, width=CONSTANTS['entry_width'])
-    number_of_remaining_flags = len(BOMBS) - CONSTANTS['number_of_placed_flags']
+    number_of_remaining_flags = len(GAME.bombs) - CONSTANTS['number_of_placed_flags']
     flags = CONSTANTS['flag']
     REMAINING_FLAGS_LABEL = Label(header, text=flags + ": " + str(number_of_remaining_flags))
 
     start_button = Button(header, text='Start',
                           command=lambda: update_custom_difficulty_and_restart(
                               rows_entry.get(), columns_entry.get(), bombs_entry.get()))
+    no_guess_button = Checkbutton(header, text="No guessing", variable=NO_GUESS)
 
     rows_label.pack(side=LEFT)
     rows_entry.pack(side=LEFT)
@@ -1079,6 +884,7 @@ def init_header():
     bombs_label.pack(side=LEFT)
     bombs_entry.pack(side=LEFT)
     REMAINING_FLAGS_LABEL.pack(side=LEFT)
+    no_guess_button.pack(side=LEFT)
     start_button.pack(side=LEFT)
 
 
@@ -1089,7 +895,7 @@ def init_timer_section():
     section = Canvas(WINDOW, width=WINDOW.winfo_screenwidth(), height=section_height)
     section.grid(row=1, column=0)
 
-    global TIMER_ENTRY, TIME_LABEL
+    global TIMER_ENTRY, TIME_LABEL, CLOCK, OVERLAY_LABEL
     timer_label = Label(section, text="Timer:")
     TIMER_ENTRY = Entry(section, width=CONSTANTS['entry_width'])
     TIME_LABEL = Label(section, text="Left: " + str(TIME_LEFT))
@@ -1098,10 +904,39 @@ def init_timer_section():
     TIMER_ENTRY.pack(side=LEFT)
     TIME_LABEL.pack(side=LEFT)
 
+    CLOCK = GameClock(WINDOW, update_time_left, show_time_over_popup)
+
+    OVERLAY_LABEL = Label(section)
+    LATENCY.listeners.append(refresh_overlay)
+
+
+def init_window():
+    """Creates the window, the scrollable canvas of the board and the objects
+    drawing on it. Nothing is created when the module is imported, since the
+    layout workers import it again."""
+
+    global WINDOW, BOARD_FRAME, CANVAS, HORIZONTAL_SCROLLBAR, VERTICAL_SCROLLBAR, TIMER_ENTRY, TIME_LABEL, \
+        REMAINING_FLAGS_LABEL, NO_GUESS, RENDERER, LATENCY, OVERLAY_LABEL
+
+    WINDOW = Tk()
+    BOARD_FRAME = Frame(WINDOW)
+    CANVAS = Canvas(BOARD_FRAME)
+    HORIZONTAL_SCROLLBAR = Scrollbar(BOARD_FRAME, orient=HORIZONTAL, command=CANVAS.xview)
+    VERTICAL_SCROLLBAR = Scrollbar(BOARD_FRAME, orient=VERTICAL, command=CANVAS.yview)
+    TIMER_ENTRY = Entry(WINDOW)
+    TIME_LABEL = Label(WINDOW)
+    REMAINING_FLAGS_LABEL = Label(WINDOW)
+    NO_GUESS = BooleanVar(WINDOW, value=False)
+
+    RENDERER = (ImageRenderer if CONSTANTS['image_renderer'] else ViewportRenderer)(CANVAS, CONSTANTS, COLORS)
+    LATENCY = LatencyRecorder(RENDERER, CONSTANTS['latency_records'])
+    OVERLAY_LABEL = Label(WINDOW)
+
 
 def start_game():
     """Initializes the main game elements, both visual and logical."""
 
+    init_window()
     init_values(CONSTANTS['number_of_rows'], CONSTANTS['number_of_columns'], CONSTANTS['number_of_bombs'])
 
     init_header()
@@ -1109,6 +944,8 @@ def start_game():
     init_board()
 
     WINDOW.mainloop()
+    LAYOUT_POOL.shutdown()
 
 
-start_game()
+if __name__ == '__main__':
+    start_game()
@@ -0,0 +1,154 @@
+"""This module records how long the actions of the player take, from the
+input event until the board is painted, how much of that time is spent in
+the engine and in the renderer, and how many canvas operations every action
+needs. The last records are kept in a ring buffer, summarized as
+percentiles and written to a file on request.
+"""
+
+import json
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+METRICS = ['total_ms', 'engine_ms', 'paint_ms', 'canvas_operations']
+
+
+def get_percentile(sorted_values, fraction):
+    """Returns a percentile of sorted values, by the nearest rank.
+
+    Parameters
+    ----------
+    sorted_values : list
+        A non-empty list of numbers in increasing order
+    fraction : float
+        The percentile as a fraction between 0 and 1
+
+    Returns
+    ----------
+    float
+        The value below which the given fraction of the values lies
+    """
+
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LatencyRecorder:
+    """Records the latency of the actions of the player.
+
+    Parameters
+    ----------
+    renderer : CanvasRenderer
+        The renderer whose canvas operations are counted
+    capacity : int
+        The number of actions that are kept
+    """
+
+    def __init__(self, renderer, capacity=512):
+        self.renderer = renderer
+        self.records = deque(maxlen=capacity)
+        self.current = None
+        self.listeners = []
+        renderer.flush_listeners.append(self.finish)
+
+    def start(self, action):
+        """Starts recording an action, when its input event arrives. An
+        action still waiting for its paint is finished first.
+
+        Parameters
+        ----------
+        action : str
+            The name of the action
+        """
+
+        if self.current is not None:
+            self.finish()
+        self.current = {'action': action, 'start': perf_counter(), 'engine_ms': 0.0,
+                        'operations_at_start': self.renderer.canvas_operations}
+
+    @contextmanager
+    def measure_engine(self):
+        """Adds the time spent inside the block to the engine time of the
+        current action."""
+
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                self.current['engine_ms'] += (perf_counter() - start_time) * 1000
+
+    def finish(self, paint_time=0.0):
+        """Finishes the current action, once its changes are painted, and
+        adds it to the records. Used as a flush listener of the renderer.
+
+        Parameters
+        ----------
+        paint_time : float
+            The duration of the redraw that painted the action, in
+            milliseconds
+        """
+
+        current = self.current
+        if current is None:
+            return
+        self.current = None
+
+        record = {'action': current['action'], 'total_ms': (perf_counter() - current['start']) * 1000,
+                  'engine_ms': current['engine_ms'], 'paint_ms': paint_time,
+                  'canvas_operations': self.renderer.canvas_operations - current['operations_at_start']}
+        self.records.append(record)
+        for listener in self.listeners:
+            listener()
+
+    def summarize(self):
+        """Summarizes the records.
+
+        Returns
+        ----------
+        dict
+            A dict mapping every metric to a dict with its 'p50', 'p95' and
+            'max' values, empty if nothing was recorded
+        """
+
+        if not self.records:
+            return {}
+
+        summary = {}
+        for metric in METRICS:
+            values = sorted(record[metric] for record in self.records)
+            summary[metric] = {'p50': get_percentile(values, 0.5), 'p95': get_percentile(values, 0.95),
+                               'max': values[-1]}
+        return summary
+
+    def format_summary(self):
+        """Formats the summary in a single line for the overlay.
+
+        Returns
+        ----------
+        str
+            The summary, or an empty string if nothing was recorded
+        """
+
+        summary = self.summarize()
+        if not summary:
+            return ''
+
+        parts = []
+        for metric, name, unit in [('total_ms', 'total', 'ms'), ('engine_ms', 'engine', 'ms'),
+                                   ('paint_ms', 'paint', 'ms'), ('canvas_operations', 'canvas', 'ops')]:
+            values = summary[metric]
+            parts.append(f'{name} {values["p50"]:.1f}/{values["p95"]:.1f}/{values["max"]:.1f} {unit}')
+        return f'p50/p95/max of {len(self.records)} actions: ' + ', '.join(parts)
+
+    def dump(self, path):
+        """Writes the records and their summary to a JSON file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file
+        """
+
+        with open(path, 'w') as file:
+            json.dump({'summary': self.summarize(), 'records': list(self.records)}, file, indent=2)
@@ -0,0 +1,186 @@
+"""This module contains the no-guess mode of the game, in which every board
+can be solved from the first click without guessing.
+
+The bombs are first generated as usual. The board is then played by the
+solver; while the solver gets stuck, a few bombs on the squares it could not
+decide are moved elsewhere, preferably away from the opened area, and the
+board is played again. Only the layout carries over between attempts: each
+attempt counts the numbers of a new board and plays it with a new solver, so
+an attempt costs time proportional to the whole board, and large dense
+boards can take seconds. Moving a few bombs at a time keeps most of the
+layout solvable, so far fewer attempts are needed than with boards
+generated from scratch. The layout of a seed is repaired once for the
+middle of the board, which lets it be generated in advance and only touched
+up after the first click.
+"""
+
+import random
+from array import array
+from time import perf_counter
+
+from engine import Game, STATES
+from solver import Solver, play_without_guessing
+
+
+class NoGuessGame(Game):
+    """A game whose bombs are placed so that it can be won without guessing.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs that the round will have
+    debug : bool
+        If True, the counters of the game are checked against a full scan of
+        the board after every action
+    seed : int
+        The seed of the bomb generator; a random one is chosen if None
+    maximum_attempts : int
+        The number of times the board is played before giving up and keeping
+        a board that may need a guess
+    """
+
+    def __init__(self, rows, columns, number_of_bombs, debug=False, seed=None, maximum_attempts=1000):
+        self.maximum_attempts = maximum_attempts
+        self.generation_attempts = 0
+        self.generation_time = 0.0
+        self.solvable = False
+        super().__init__(rows, columns, number_of_bombs, debug, seed)
+
+    def generate_bombs(self, square_coords):
+        """Generates bombs that can all be found without guessing, starting
+        from the given square. The number of attempts and the time spent,
+        including those of the layout if it was not generated in advance,
+        are kept in 'generation_attempts' and 'generation_time'.
+
+        Parameters
+        ----------
+        square_coords : tuple
+            Tuple that represents the coordinates of the square on the board
+        """
+
+        start_time = perf_counter()
+        self.generation_attempts = 0
+        super().generate_bombs(square_coords)
+        self.set_bombs(self.make_solvable(self.bombs, square_coords))
+        self.generation_time = perf_counter() - start_time
+
+    def generate_layout(self):
+        """Generates the bombs of the seed of the game, already repaired to be
+        solvable from the middle of the board. Adapting this layout to
+        another first square usually needs only a few more repairs.
+
+        Returns
+        ----------
+        array
+            The positions of the bombs, indexed like the states
+        """
+
+        middle_coords = (self.rows // 2, self.columns // 2)
+        return self.make_solvable(self.adapt_layout(super().generate_layout(), middle_coords), middle_coords)
+
+    def make_solvable(self, bombs, square_coords):
+        """Plays the given bombs with the solver from the given square and
+        repairs them until the solver wins or 'maximum_attempts' is reached.
+        Whether it succeeded is kept in 'solvable'.
+
+        Parameters
+        ----------
+        bombs : array
+            The positions of the bombs, indexed like the states, none of them
+            on the given square or its neighbours
+        square_coords : tuple
+            Tuple that represents the coordinates of the first square
+
+        Returns
+        ----------
+        array
+            The positions of the repaired bombs
+        """
+
+        row, column = square_coords
+        generator = random.Random(f'{self.seed}:no-guess:{row}:{column}')
+        bombs = list(bombs)
+        self.solvable = False
+        for _ in range(self.maximum_attempts):
+            self.generation_attempts += 1
+            trial = Game(self.rows, self.columns, self.number_of_bombs)
+            trial.set_bombs(bombs)
+            trial.generate_numbers()
+            trial.clear_terrain(square_coords)
+
+            solver = Solver(trial)
+            if play_without_guessing(trial, solver):
+                self.solvable = True
+                break
+            if not self.move_undecided_bombs(trial, solver, bombs, square_coords, generator):
+                break
+        return array('I', bombs)
+
+    @staticmethod
+    def move_undecided_bombs(trial, solver, bombs, square_coords, generator):
+        """Moves some of the bombs that the solver could not decide to squares
+        that are not next to the undecided ones.
+
+        Parameters
+        ----------
+        trial : Game
+            The game the solver got stuck on
+        solver : Solver
+            The solver that got stuck
+        bombs : list
+            The positions of the bombs, indexed like the states; it is changed
+            in place
+        square_coords : tuple
+            Tuple that represents the coordinates of the first square
+        generator : Random
+            The generator the moves are chosen with
+
+        Returns
+        ----------
+        bool
+            False if no bomb could be moved
+        """
+
+        frontier_squares = set()
+        for squares, _ in solver.frontier.values():
+            frontier_squares |= squares
+
+        columns = trial.columns
+        undecided_bombs = [row * columns + column for row, column in frontier_squares
+                           if trial.is_bomb((row, column)) and (row, column) not in solver.known_mines]
+
+        # Unknown squares away from the opened area are the best targets. If
+        # there are none left, or the undecided bombs are walled off by known
+        # ones, the bombs are moved into the opened area, which the next
+        # attempt will open differently.
+        first_row, first_column = square_coords
+        unknown_targets = []
+        opened_targets = []
+        for row in range(trial.rows):
+            for column in range(trial.columns):
+                if (row, column) in frontier_squares or trial.is_bomb((row, column)):
+                    continue
+                if abs(row - first_row) <= 1 and abs(column - first_column) <= 1:
+                    continue
+                if trial.get_square_state(row, column) == STATES['unblocked']:
+                    opened_targets.append(row * columns + column)
+                else:
+                    unknown_targets.append(row * columns + column)
+
+        targets = unknown_targets or opened_targets
+        if not undecided_bombs:
+            undecided_bombs = [position for position in bombs if divmod(position, columns) not in solver.known_mines]
+            targets = opened_targets
+        if not undecided_bombs or not targets:
+            return False
+
+        number_of_moves = min(len(targets), max(1, len(undecided_bombs) // 4))
+        moved_bombs = set(generator.sample(sorted(undecided_bombs), k=min(number_of_moves, len(undecided_bombs))))
+        new_positions = generator.sample(targets, k=len(moved_bombs))
+
+        bombs[:] = [position for position in bombs if position not in moved_bombs] + new_positions
+        return True
@@ -0,0 +1,142 @@
+"""This module contains a pool of layouts generated in advance by background
+worker processes, so the first click of a game does not wait for the bombs
+to be generated.
+
+A layout is the positions of the bombs of a seed with the numbers they
+give, generated before the first square is known. When the first click
+comes, the game only moves the few bombs that are on or next to the clicked
+square and counts again the squares around them. The pool keeps layouts
+for a single configuration of the board; changing the configuration drops
+them and replaces the workers, so new layouts do not wait behind those of
+the previous configuration.
+
+The workers are spawned rather than forked, so they do not inherit the
+state of the game or of tkinter. They import the module that started the
+game again, which must therefore only open its window when it is run.
+"""
+
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def generate_layout(game_class, rows, columns, number_of_bombs, seed):
+    """Generates the layout of a seed and its numbers in a worker process.
+
+    Parameters
+    ----------
+    game_class : type
+        The engine class whose layout is generated
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the board
+    seed : int
+        The seed of the game
+
+    Returns
+    ----------
+    tuple
+        A tuple of the positions of the bombs and the buffer of numbers of
+        the layout
+    """
+
+    game = game_class(rows, columns, number_of_bombs, seed=seed)
+    game.layout = game.generate_layout()
+    game.set_bombs(game.layout)
+    game.generate_numbers()
+    return game.layout, game.numbers
+
+
+class LayoutPool:
+    """Layouts of one configuration, generated by a process pool.
+
+    Parameters
+    ----------
+    maximum_size : int
+        The number of layouts that are kept ready or being generated
+    max_workers : int
+        The number of worker processes
+    """
+
+    def __init__(self, maximum_size=4, max_workers=1):
+        self.maximum_size = maximum_size
+        self.max_workers = max_workers
+        self.executor = None
+        self.configuration = None
+        self.pending = []
+
+    def configure(self, game_class, rows, columns, number_of_bombs):
+        """Sets the configuration the layouts are generated for. If it
+        changed, the layouts of the previous configuration are dropped and
+        the workers are replaced; the layouts already being generated cannot
+        be cancelled, so the old workers finish them and exit while the new
+        ones start on the new configuration.
+
+        Parameters
+        ----------
+        game_class : type
+            The engine class whose layouts are generated
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        number_of_bombs : int
+            The number of bombs of the board
+        """
+
+        configuration = (game_class, rows, columns, number_of_bombs)
+        if configuration == self.configuration:
+            return
+
+        self.shutdown()
+        self.configuration = configuration
+
+    def fill(self):
+        """Starts generating layouts until 'maximum_size' of them are ready
+        or being generated."""
+
+        if self.configuration is None:
+            return
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+
+        while len(self.pending) < self.maximum_size:
+            seed = random.randrange(2 ** 32)
+            future = self.executor.submit(generate_layout, *self.configuration, seed)
+            self.pending.append((seed, future))
+
+    def take(self):
+        """Removes a finished layout from the pool, without waiting for one.
+
+        Returns
+        ----------
+        tuple
+            A tuple of the seed, the bombs and the numbers of a layout, or None
+            if no layout is ready
+        """
+
+        for seed, future in list(self.pending):
+            if not future.done():
+                continue
+            self.pending.remove((seed, future))
+            if future.cancelled():
+                continue
+            if isinstance(future.exception(), BrokenProcessPool):
+                self.shutdown()
+                return None
+            if future.exception() is None:
+                return (seed,) + future.result()
+        return None
+
+    def shutdown(self):
+        """Stops the worker processes, dropping the layouts being generated."""
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.pending = []
@@ -0,0 +1,619 @@
+"""This module contains the renderer that draws the minesweeper board on a
+tkinter canvas. Each square owns one rectangle and one text item that are
+created once and afterwards only reconfigured, so the number of canvas items
+stays constant no matter how long a session lasts. The squares changed by
+the game are collected in a dirty set and redrawn together once per frame.
+The renderer counts its canvas operations and tells its flush listeners how
+long every redraw took. For boards larger than the window, the viewport
+renderer only keeps items for the squares that are currently visible, and
+the image renderer draws them into a single photo image instead of keeping
+items at all.
+"""
+
+from time import perf_counter
+from tkinter import PhotoImage
+
+from engine import STATES
+
+GLYPH_COLOR = '#000000'
+
+GLYPHS = {'1': ['..#..', '.##..', '..#..', '..#..', '.###.'],
+          '2': ['.###.', '....#', '.###.', '#....', '#####'],
+          '3': ['####.', '....#', '.###.', '....#', '####.'],
+          '4': ['#..#.', '#..#.', '#####', '...#.', '...#.'],
+          '5': ['#####', '#....', '####.', '....#', '####.'],
+          '6': ['.###.', '#....', '####.', '#...#', '.###.'],
+          '7': ['#####', '....#', '...#.', '..#..', '..#..'],
+          '8': ['.###.', '#...#', '.###.', '#...#', '.###.'],
+          'flag': ['.##..', '.###.', '.##..', '.#...', '###..'],
+          'bomb': ['..#..', '.###.', '#####', '.###.', '..#..'],
+          'question_mark': ['.###.', '#...#', '..##.', '.....', '..#..']}
+
+
+class CanvasRenderer:
+    """Draws a game on a canvas using one reusable rectangle and one reusable
+    text item per square.
+
+    Parameters
+    ----------
+    canvas : Canvas
+        The canvas the board is drawn on
+    constants : dict
+        The constants of the game, with the 'square_size', 'flag', 'bomb' and
+        'question_mark' keys used for drawing
+    colors : dict
+        The colors of the game, with the keys of the blocked and open squares
+    """
+
+    def __init__(self, canvas, constants, colors):
+        self.canvas = canvas
+        self.constants = constants
+        self.colors = colors
+        self.game = None
+
+        self.rows = 0
+        self.columns = 0
+        self.square_items = {}
+        self.painted = set()
+
+        self.bombs_shown = False
+        self.flush_scheduled = False
+        self.canvas_operations = 0
+        self.flush_listeners = []
+
+    def attach(self, game):
+        """Starts drawing the given game, whose state changes will be
+        collected in its dirty set.
+
+        Parameters
+        ----------
+        game : Game
+            The game that will be drawn
+        """
+
+        self.game = game
+        game.dirty_squares = set()
+
+    def get_square_color(self, row, column, kind):
+        """Returns the color of a square, resembling a chessboard.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        kind : str
+            Either 'blocked' or 'open'
+
+        Returns
+        ----------
+        str
+            A string representing the color of the square
+        """
+
+        if (row + column) % 2 == 0:
+            return self.colors[kind + '-square-even']
+        return self.colors[kind + '-square-odd']
+
+    def get_square_look(self, row, column):
+        """Returns the fill color and the text of a square according to the
+        state of the game.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+
+        Returns
+        ----------
+        tuple
+            A tuple of two strings, the fill color and the text of the square
+        """
+
+        blocked_color = self.get_square_color(row, column, 'blocked')
+        if self.game is None:
+            return blocked_color, ''
+
+        if self.bombs_shown and self.game.is_bomb((row, column)):
+            return blocked_color, self.constants['bomb']
+
+        state = self.game.get_square_state(row, column)
+        if state == STATES['unblocked']:
+            number = self.game.get_square_number(row, column)
+            return self.get_square_color(row, column, 'open'), '' if number == 0 else str(number)
+        if state == STATES['flagged']:
+            return blocked_color, self.constants['flag']
+        if state == STATES['marked']:
+            return blocked_color, self.constants['question_mark']
+        return blocked_color, ''
+
+    def reset(self, rows, columns):
+        """Shows a board of blocked squares. The canvas items are created only
+        if the size of the board changed, otherwise the items of the squares
+        painted since the last reset are restored.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        """
+
+        self.bombs_shown = False
+        if self.game is not None:
+            self.game.dirty_squares = set()
+
+        if (rows, columns) != (self.rows, self.columns):
+            self.create_items(rows, columns)
+            return
+
+        painted = self.painted
+        self.painted = set()
+        for index in painted:
+            self.draw_square(*divmod(index, self.columns))
+
+    def create_items(self, rows, columns):
+        """Deletes every item of the canvas and creates the items of a board
+        of blocked squares.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        """
+
+        self.canvas.delete('all')
+        self.canvas_operations += 1
+        self.rows = rows
+        self.columns = columns
+        self.square_items = {}
+        self.painted = set()
+
+        for i in range(rows):
+            for j in range(columns):
+                self.create_square_items(i, j)
+
+    def create_square_items(self, row, column):
+        """Creates the rectangle and the text item of a square, showing the
+        current look of the square.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        """
+
+        square_size = self.constants['square_size']
+        fill, text = self.get_square_look(row, column)
+        rectangle = self.canvas.create_rectangle(column * square_size, row * square_size,
+                                                 (column + 1) * square_size, (row + 1) * square_size, fill=fill)
+        text_item = self.canvas.create_text(column * square_size + square_size / 2,
+                                            row * square_size + square_size / 2, text=text)
+        self.square_items[row * self.columns + column] = [rectangle, text_item, fill, text]
+        self.canvas_operations += 2
+
+    def draw_square(self, row, column):
+        """Reconfigures the items of a square that no longer match the state
+        of the game. Squares without items are skipped.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        """
+
+        index = row * self.columns + column
+        items = self.square_items.get(index)
+        if items is None:
+            return
+
+        fill, text = self.get_square_look(row, column)
+        if items[2] != fill:
+            self.canvas.itemconfig(items[0], fill=fill)
+            self.canvas_operations += 1
+            items[2] = fill
+        if items[3] != text:
+            self.canvas.itemconfig(items[1], text=text)
+            self.canvas_operations += 1
+            items[3] = text
+
+        if fill == self.get_square_color(row, column, 'blocked') and text == '':
+            self.painted.discard(index)
+        else:
+            self.painted.add(index)
+
+    def show_bombs(self):
+        """Shows the bombs of the game on top of their squares."""
+
+        self.bombs_shown = True
+        columns = self.game.columns
+        self.game.dirty_squares.update(divmod(position, columns) for position in self.game.bombs)
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        """Schedules a redraw of the dirty squares for the next time the
+        event loop is idle. Changes made before the redraw are coalesced."""
+
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.canvas.after_idle(self.flush)
+
+    def flush(self):
+        """Redraws every dirty square once, empties the dirty set and calls
+        the flush listeners with the duration of the redraw in
+        milliseconds."""
+
+        self.flush_scheduled = False
+        if self.game is None:
+            return
+
+        start_time = perf_counter()
+        dirty_squares = self.game.dirty_squares
+        self.game.dirty_squares = set()
+        self.draw_dirty_squares(dirty_squares)
+
+        paint_time = (perf_counter() - start_time) * 1000
+        for listener in self.flush_listeners:
+            listener(paint_time)
+
+    def draw_dirty_squares(self, dirty_squares):
+        """Redraws the given squares.
+
+        Parameters
+        ----------
+        dirty_squares : set
+            A set of tuples representing coordinates of the squares changed
+            since the last redraw
+        """
+
+        for row, column in dirty_squares:
+            self.draw_square(row, column)
+
+
+class ViewportRenderer(CanvasRenderer):
+    """Draws a game on a scrollable canvas, keeping items only for the
+    squares inside the visible area plus a margin. Items of squares that
+    scroll out of view are reused for the squares that scroll into view, so
+    memory and drawing time depend on the size of the window instead of the
+    size of the board.
+
+    Parameters
+    ----------
+    canvas : Canvas
+        The canvas the board is drawn on
+    constants : dict
+        The constants of the game, with the 'square_size', 'flag', 'bomb',
+        'question_mark' and 'viewport_margin' keys used for drawing
+    colors : dict
+        The colors of the game, with the keys of the blocked and open squares
+    """
+
+    def __init__(self, canvas, constants, colors):
+        super().__init__(canvas, constants, colors)
+        self.visible_area = None
+        self.free_items = []
+
+    def reset(self, rows, columns):
+        """Shows a board of blocked squares, reusing the items of the visible
+        squares if the size of the board did not change.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        """
+
+        self.bombs_shown = False
+        if self.game is not None:
+            self.game.dirty_squares = set()
+
+        if (rows, columns) != (self.rows, self.columns):
+            self.create_items(rows, columns)
+            return
+
+        self.redraw_visible_squares()
+
+    def create_items(self, rows, columns):
+        """Deletes every item of the canvas and creates the items of the
+        visible squares.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        """
+
+        self.canvas.delete('all')
+        self.canvas_operations += 1
+        self.rows = rows
+        self.columns = columns
+        self.square_items = {}
+        self.free_items = []
+        self.visible_area = None
+        self.update_viewport()
+
+    def get_visible_area(self):
+        """Computes the squares covered by the visible part of the canvas,
+        extended by the margin.
+
+        Returns
+        ----------
+        tuple
+            A tuple of four integers: the first row, the row after the last
+            one, the first column and the column after the last one
+        """
+
+        square_size = self.constants['square_size']
+        margin = self.constants['viewport_margin']
+        left = self.canvas.canvasx(0)
+        top = self.canvas.canvasy(0)
+        width = int(self.canvas.cget('width'))
+        height = int(self.canvas.cget('height'))
+
+        first_row = max(0, int(top // square_size) - margin)
+        last_row = min(self.rows, int((top + height) // square_size) + 1 + margin)
+        first_column = max(0, int(left // square_size) - margin)
+        last_column = min(self.columns, int((left + width) // square_size) + 1 + margin)
+        return first_row, last_row, first_column, last_column
+
+    def update_viewport(self):
+        """Moves the items of the squares that left the visible area to the
+        squares that entered it. Called whenever the canvas is scrolled."""
+
+        visible_area = self.get_visible_area()
+        if visible_area == self.visible_area:
+            return
+        self.visible_area = visible_area
+        first_row, last_row, first_column, last_column = visible_area
+
+        for index in list(self.square_items):
+            row, column = divmod(index, self.columns)
+            if not (first_row <= row < last_row and first_column <= column < last_column):
+                self.free_items.append(self.square_items.pop(index))
+                self.painted.discard(index)
+
+        for row in range(first_row, last_row):
+            for column in range(first_column, last_column):
+                if row * self.columns + column not in self.square_items:
+                    if self.free_items:
+                        self.reuse_square_items(row, column, self.free_items.pop())
+                    else:
+                        self.create_square_items(row, column)
+
+        for rectangle, text_item, _, _ in self.free_items:
+            self.canvas.itemconfig(rectangle, state='hidden')
+            self.canvas.itemconfig(text_item, state='hidden')
+        self.canvas_operations += 2 * len(self.free_items)
+
+    def reuse_square_items(self, row, column, items):
+        """Moves the items of another square to the given square and shows
+        the current look of the square with them.
+
+        Parameters
+        ----------
+        row : int
+            The row of a square inside the board
+        column : int
+            The column of a square inside the board
+        items : list
+            The rectangle, the text item, the fill color and the text that
+            belonged to another square
+        """
+
+        square_size = self.constants['square_size']
+        rectangle, text_item, _, _ = items
+        self.canvas.coords(rectangle, column * square_size, row * square_size,
+                           (column + 1) * square_size, (row + 1) * square_size)
+        self.canvas.coords(text_item, column * square_size + square_size / 2, row * square_size + square_size / 2)
+
+        fill, text = self.get_square_look(row, column)
+        self.canvas.itemconfig(rectangle, fill=fill, state='normal')
+        self.canvas.itemconfig(text_item, text=text, state='normal')
+        self.canvas_operations += 4
+        self.square_items[row * self.columns + column] = [rectangle, text_item, fill, text]
+
+    def redraw_visible_squares(self):
+        """Redraws every square that has items."""
+
+        for index in list(self.square_items):
+            self.draw_square(*divmod(index, self.columns))
+
+    def draw_dirty_squares(self, dirty_squares):
+        """Redraws the given squares that are visible. If more squares changed
+        than are visible, the visible squares are redrawn instead of looking
+        up every changed square.
+
+        Parameters
+        ----------
+        dirty_squares : set
+            A set of tuples representing coordinates of the squares changed
+            since the last redraw
+        """
+
+        if len(dirty_squares) > len(self.square_items):
+            self.redraw_visible_squares()
+        else:
+            for row, column in dirty_squares:
+                self.draw_square(row, column)
+
+
+class ImageRenderer(ViewportRenderer):
+    """Draws a game into a single photo image covering the visible squares,
+    so there are no canvas items per square at all. Numbers, flags and bombs
+    are drawn as small pixel glyphs. Changed squares are redrawn by writing
+    their pixel blocks with one put call per run of adjacent squares on a
+    row, and the image only grows with the window, so memory and drawing
+    time do not depend on the size of the board.
+
+    Parameters
+    ----------
+    canvas : Canvas
+        The canvas the board is drawn on
+    constants : dict
+        The constants of the game, with the 'square_size', 'flag', 'bomb',
+        'question_mark' and 'viewport_margin' keys used for drawing
+    colors : dict
+        The colors of the game, with the keys of the blocked and open squares
+    """
+
+    def __init__(self, canvas, constants, colors):
+        super().__init__(canvas, constants, colors)
+        self.image = None
+        self.image_item = None
+        self.glyphs = {str(number): GLYPHS[str(number)] for number in range(1, 9)}
+        self.glyphs.update({constants['flag']: GLYPHS['flag'], constants['bomb']: GLYPHS['bomb'],
+                            constants['question_mark']: GLYPHS['question_mark']})
+        self.blocks = {}
+
+    def create_items(self, rows, columns):
+        """Deletes every item of the canvas and creates the image of the
+        visible squares.
+
+        Parameters
+        ----------
+        rows : int
+            The number of rows of the board
+        columns : int
+            The number of columns of the board
+        """
+
+        self.canvas.delete('all')
+        self.rows = rows
+        self.columns = columns
+        self.visible_area = None
+        if self.image is None:
+            self.image = PhotoImage(master=self.canvas, width=0, height=0)
+        self.image_item = self.canvas.create_image(0, 0, image=self.image, anchor='nw')
+        self.canvas_operations += 2
+        self.update_viewport()
+
+    def get_block(self, fill, text):
+        """Returns the pixels of a square with the given look. Blocks are
+        computed once per look and cached.
+
+        Parameters
+        ----------
+        fill : str
+            The fill color of the square
+        text : str
+            The text of the square
+
+        Returns
+        ----------
+        list
+            A list of strings, the colors of every pixel row of the square
+            separated by spaces
+        """
+
+        block = self.blocks.get((fill, text))
+        if block is not None:
+            return block
+
+        square_size = self.constants['square_size']
+        pixels = [[fill] * square_size for _ in range(square_size)]
+        glyph = self.glyphs.get(text)
+        scale = square_size // 7
+        if glyph is not None and scale > 0:
+            offset = (square_size - 5 * scale) // 2
+            for glyph_row, line in enumerate(glyph):
+                for glyph_column, character in enumerate(line):
+                    if character != '#':
+                        continue
+                    for y in range(scale):
+                        row_pixels = pixels[offset + glyph_row * scale + y]
+                        for x in range(scale):
+                            row_pixels[offset + glyph_column * scale + x] = GLYPH_COLOR
+
+        block = [' '.join(row_pixels) for row_pixels in pixels]
+        self.blocks[(fill, text)] = block
+        return block
+
+    def put_run(self, row, first_column, last_column):
+        """Writes the pixel blocks of adjacent squares of a row into the
+        image with a single put call.
+
+        Parameters
+        ----------
+        row : int
+            The row of the squares
+        first_column : int
+            The column of the first square
+        last_column : int
+            The column after the last square
+        """
+
+        blocks = [self.get_block(*self.get_square_look(row, column)) for column in range(first_column, last_column)]
+        data = ' '.join('{' + ' '.join(block[y] for block in blocks) + '}' for y in range(len(blocks[0])))
+
+        square_size = self.constants['square_size']
+        first_row, _, first_visible_column, _ = self.visible_area
+        self.image.put(data, to=((first_column - first_visible_column) * square_size,
+                                 (row - first_row) * square_size))
+        self.canvas_operations += 1
+
+    def update_viewport(self):
+        """Moves the image to the visible area and redraws it, if the visible
+        area changed. Called whenever the canvas is scrolled."""
+
+        visible_area = self.get_visible_area()
+        if visible_area == self.visible_area:
+            return
+        self.visible_area = visible_area
+        first_row, last_row, first_column, last_column = visible_area
+
+        square_size = self.constants['square_size']
+        self.image.configure(width=(last_column - first_column) * square_size,
+                             height=(last_row - first_row) * square_size)
+        self.canvas.coords(self.image_item, first_column * square_size, first_row * square_size)
+        self.canvas_operations += 2
+        self.redraw_visible_squares()
+
+    def redraw_visible_squares(self):
+        """Redraws the whole image, with one put call per row."""
+
+        first_row, last_row, first_column, last_column = self.visible_area
+        if first_column >= last_column:
+            return
+        for row in range(first_row, last_row):
+            self.put_run(row, first_column, last_column)
+
+    def draw_dirty_squares(self, dirty_squares):
+        """Redraws the given squares that are visible, with one put call per
+        run of adjacent squares on a row. If more squares changed than are
+        visible, the whole image is redrawn instead.
+
+        Parameters
+        ----------
+        dirty_squares : set
+            A set of tuples representing coordinates of the squares changed
+            since the last redraw
+        """
+
+        first_row, last_row, first_column, last_column = self.visible_area
+        if len(dirty_squares) > (last_row - first_row) * (last_column - first_column):
+            self.redraw_visible_squares()
+            return
+
+        visible_squares = sorted((row, column) for row, column in dirty_squares
+                                 if first_row <= row < last_row and first_column <= column < last_column)
+        run_start = 0
+        for position in range(1, len(visible_squares) + 1):
+            row, column = visible_squares[position - 1]
+            if position < len(visible_squares) and visible_squares[position] == (row, column + 1):
+                continue
+            self.put_run(row, visible_squares[run_start][1], column + 1)
+            run_start = position
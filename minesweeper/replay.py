@@ -0,0 +1,308 @@
+"""This module records games of minesweeper into compact replay logs and
+replays them without a display. A log starts with the size, the number of
+bombs, the seed and the mode of the game, followed by every action, all
+encoded as unsigned varints. A batch of revealed squares is written as the
+number of squares followed by their coordinates.
+
+A log only holds the seed, not the bombs, so it replays the same game only
+with an engine that generates the same bombs from a seed. A change to the
+header or to the way bombs are generated therefore needs a new magic once
+logs have been published; there is a single format so far, 'MSR1'.
+
+Run it with the paths of replay files to replay them at full engine speed:
+
+    python replay.py game1.msr game2.msr
+"""
+
+import sys
+from time import perf_counter
+
+from engine import Game
+from history import History
+from noguess import NoGuessGame
+
+MAGIC = b'MSR1'
+
+ACTIONS = {'start': 0, 'click': 1, 'flag': 2, 'mark': 3, 'time_over': 4, 'chord': 5, 'reveal': 6,
+           'undo': 7, 'redo': 8}
+
+MODES = {'classic': 0, 'no_guess': 1}
+
+
+def encode_varint(number, buffer):
+    """Appends an unsigned integer to a buffer, seven bits per byte, with the
+    highest bit of a byte showing that more bytes follow.
+
+    Parameters
+    ----------
+    number : int
+        A non-negative integer
+    buffer : bytearray
+        The buffer the encoded integer is appended to
+    """
+
+    while number > 0x7f:
+        buffer.append((number & 0x7f) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def decode_varint(data, position):
+    """Reads an unsigned integer encoded by encode_varint.
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded data
+    position : int
+        The position of the first byte of the integer
+
+    Returns
+    ----------
+    tuple
+        A tuple of the decoded integer and the position after it
+    """
+
+    number = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
+
+
+class ReplayLog:
+    """The seed and the actions of one game, encoded as they are recorded.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the game
+    seed : int
+        The seed of the game
+    mode : str
+        One of the keys of MODES
+    """
+
+    def __init__(self, rows, columns, number_of_bombs, seed, mode='classic'):
+        self.rows = rows
+        self.columns = columns
+        self.number_of_bombs = number_of_bombs
+        self.seed = seed
+        self.mode = mode
+        self.actions = bytearray()
+
+    def record(self, action, square_coords=None):
+        """Appends an action to the log.
+
+        Parameters
+        ----------
+        action : str
+            One of the keys of ACTIONS
+        square_coords : tuple
+            Tuple that represents the coordinates of the square the action
+            was made on, None for 'time_over', 'undo' and 'redo'
+        """
+
+        encode_varint(ACTIONS[action], self.actions)
+        if square_coords is not None:
+            encode_varint(square_coords[0], self.actions)
+            encode_varint(square_coords[1], self.actions)
+
+    def record_batch(self, action, list_of_squares):
+        """Appends an action made on a batch of squares to the log.
+
+        Parameters
+        ----------
+        action : str
+            One of the keys of ACTIONS
+        list_of_squares : list
+            A list of tuples representing coordinates of the squares the
+            action was made on
+        """
+
+        encode_varint(ACTIONS[action], self.actions)
+        encode_varint(len(list_of_squares), self.actions)
+        for row, column in list_of_squares:
+            encode_varint(row, self.actions)
+            encode_varint(column, self.actions)
+
+    def iterate_actions(self):
+        """Decodes the recorded actions.
+
+        Yields
+        ----------
+        tuple
+            A tuple of the name of the action and the coordinates of its
+            square, a list of coordinates for 'reveal', or None for
+            'time_over', 'undo' and 'redo'
+        """
+
+        names = {code: name for name, code in ACTIONS.items()}
+        data = self.actions
+        position = 0
+        while position < len(data):
+            code, position = decode_varint(data, position)
+            if names[code] in ['time_over', 'undo', 'redo']:
+                yield names[code], None
+                continue
+            if names[code] == 'reveal':
+                number_of_squares, position = decode_varint(data, position)
+                list_of_squares = []
+                for _ in range(number_of_squares):
+                    row, position = decode_varint(data, position)
+                    column, position = decode_varint(data, position)
+                    list_of_squares.append((row, column))
+                yield 'reveal', list_of_squares
+                continue
+            row, position = decode_varint(data, position)
+            column, position = decode_varint(data, position)
+            yield names[code], (row, column)
+
+    def to_bytes(self):
+        """Encodes the log with its header.
+
+        Returns
+        ----------
+        bytes
+            The encoded log
+        """
+
+        header = bytearray(MAGIC)
+        for number in [self.rows, self.columns, self.number_of_bombs, self.seed, MODES[self.mode]]:
+            encode_varint(number, header)
+        return bytes(header + self.actions)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decodes a log encoded by to_bytes.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded log
+
+        Returns
+        ----------
+        ReplayLog
+            The decoded log
+
+        Raises
+        ----------
+        ValueError
+            If the data does not start like a replay log
+        """
+
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('Not a minesweeper replay log')
+
+        position = len(MAGIC)
+        header = []
+        for _ in range(5):
+            number, position = decode_varint(data, position)
+            header.append(number)
+
+        modes = {code: name for name, code in MODES.items()}
+        log = cls(*header[:4], mode=modes[header[4]])
+        log.actions = bytearray(data[position:])
+        return log
+
+
+def record(game):
+    """Starts recording the actions of a game.
+
+    Parameters
+    ----------
+    game : Game
+        The game that will be recorded
+
+    Returns
+    ----------
+    ReplayLog
+        The log the actions of the game are recorded in
+    """
+
+    mode = 'no_guess' if isinstance(game, NoGuessGame) else 'classic'
+    game.replay_log = ReplayLog(game.rows, game.columns, game.number_of_bombs, game.seed, mode)
+    return game.replay_log
+
+
+def replay(log, game_class=None):
+    """Plays the actions of a log on a new game, without a display.
+
+    Parameters
+    ----------
+    log : ReplayLog
+        The log that will be replayed
+    game_class : type
+        The engine class the game is created with; if None, it is chosen by
+        the mode of the log
+
+    Returns
+    ----------
+    Game
+        The game in the state reached after the last action
+    """
+
+    if game_class is None:
+        game_class = NoGuessGame if log.mode == 'no_guess' else Game
+    game = game_class(log.rows, log.columns, log.number_of_bombs, seed=log.seed)
+    history = History()
+    history.attach(game)
+    for action, square_coords in log.iterate_actions():
+        if action == 'start':
+            game.start_round(square_coords)
+            history.clear()
+            continue
+
+        if action == 'click':
+            game.click_square(square_coords)
+        elif action == 'chord':
+            game.chord_square(square_coords)
+        elif action == 'reveal':
+            game.reveal_squares(square_coords)
+        elif action == 'flag':
+            game.place_or_erase_flag_on_square(square_coords)
+        elif action == 'mark':
+            game.place_or_erase_question_mark_on_square(square_coords)
+        elif action == 'undo':
+            history.undo()
+        elif action == 'redo':
+            history.redo()
+        else:
+            game.time_over()
+        history.commit()
+    return game
+
+
+def main(paths):
+    """Replays every given replay file and prints its outcome and duration.
+
+    Parameters
+    ----------
+    paths : list
+        The paths of the replay files
+    """
+
+    for path in paths:
+        with open(path, 'rb') as file:
+            log = ReplayLog.from_bytes(file.read())
+
+        start_time = perf_counter()
+        game = replay(log)
+        elapsed_time = perf_counter() - start_time
+
+        outcome = 'won' if game.won else 'lost' if game.finished else 'unfinished'
+        print(f'{path}: {log.rows}x{log.columns}, {log.number_of_bombs} bombs, seed {log.seed}, {log.mode}, '
+              f'{outcome} in {elapsed_time * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,503 @@
+"""This module saves games of minesweeper in progress to a compact binary
+file and resumes them. The file starts with a fixed header holding the size,
+the number of bombs, the seed, the mode, the counters and the clock of the
+game, followed by the bombs as a bitmap of one bit per square, the states as
+two bits per square, and the replay log of the game, so that it keeps being
+recorded after it is resumed.
+
+A saved game is resumed through a memory map of the file. The states of a
+row are only decoded when the row is first read, and the numbers of a row
+are only counted from the bombs of the three rows around it when the row is
+first read, so resuming a huge board only touches the rows that are shown
+or played.
+"""
+
+import mmap
+import os
+import struct
+from abc import ABCMeta, abstractmethod
+
+from engine import BOMB, Game
+from noguess import NoGuessGame
+from replay import MODES, ReplayLog
+
+MAGIC = b'MSS1'
+
+HEADER = struct.Struct('<4sIIQQBBBQQQQQQ')
+
+
+def pack_cells(cells, bits):
+    """Packs cells holding small values into bytes, the first cell in the
+    lowest bits of the first byte.
+
+    Parameters
+    ----------
+    cells : bytes
+        One byte per cell, each smaller than 2 ** bits, or any buffer of such
+        bytes
+    bits : int
+        The number of bits of a cell, 1 or 2
+
+    Returns
+    ----------
+    bytes
+        The packed cells, padded with zeros to a whole number of bytes
+    """
+
+    cells_per_byte = 8 // bits
+    cells = bytes(cells)
+    padded_cells = cells + bytes(-len(cells) % cells_per_byte)
+    number_of_bytes = len(padded_cells) // cells_per_byte
+
+    packed = 0
+    for k in range(cells_per_byte):
+        packed |= int.from_bytes(padded_cells[k::cells_per_byte], 'little') << (k * bits)
+    return packed.to_bytes(number_of_bytes, 'little')
+
+
+def unpack_cells(data, offset, first_cell, number_of_cells, bits):
+    """Unpacks a range of cells packed by pack_cells.
+
+    Parameters
+    ----------
+    data : bytes
+        The data holding the packed cells, usually a memory map
+    offset : int
+        The position of the first packed byte inside the data
+    first_cell : int
+        The index of the first cell to unpack
+    number_of_cells : int
+        The number of cells to unpack
+    bits : int
+        The number of bits of a cell, 1 or 2
+
+    Returns
+    ----------
+    bytearray
+        One byte per unpacked cell
+    """
+
+    cells_per_byte = 8 // bits
+    start = first_cell // cells_per_byte
+    end = (first_cell + number_of_cells + cells_per_byte - 1) // cells_per_byte
+    number_of_bytes = end - start
+    packed = int.from_bytes(data[offset + start:offset + end], 'little')
+    mask = int.from_bytes(bytes([(1 << bits) - 1]) * number_of_bytes, 'little')
+
+    cells = bytearray(number_of_bytes * cells_per_byte)
+    for k in range(cells_per_byte):
+        cells[k::cells_per_byte] = ((packed >> (k * bits)) & mask).to_bytes(number_of_bytes, 'little')
+    skipped_cells = first_cell - start * cells_per_byte
+    return cells[skipped_cells:skipped_cells + number_of_cells]
+
+
+class BombBitmap:
+    """The bombs of a saved game, read from their bitmap. It is indexed by
+    position like the mask of the bombs of a game, and lists the positions
+    of the bombs only when it is iterated.
+
+    Parameters
+    ----------
+    data : bytes
+        The data holding the bitmap, usually a memory map
+    offset : int
+        The position of the bitmap inside the data
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the board
+    """
+
+    def __init__(self, data, offset, rows, columns, number_of_bombs):
+        self.data = data
+        self.offset = offset
+        self.rows = rows
+        self.columns = columns
+        self.number_of_bombs = number_of_bombs
+
+    def __getitem__(self, position):
+        return (self.data[self.offset + (position >> 3)] >> (position & 7)) & 1
+
+    def __len__(self):
+        return self.number_of_bombs
+
+    def __iter__(self):
+        for row in range(self.rows):
+            cells = self.get_row(row)
+            column = cells.find(1)
+            while column != -1:
+                yield row * self.columns + column
+                column = cells.find(1, column + 1)
+
+    def get_row(self, row):
+        """Unpacks the bombs of a row.
+
+        Parameters
+        ----------
+        row : int
+            The row of the board
+
+        Returns
+        ----------
+        bytearray
+            One byte per square of the row, 1 for a bomb and 0 otherwise
+        """
+
+        return unpack_cells(self.data, self.offset, row * self.columns, self.columns, 1)
+
+
+class LazyRows(bytearray, metaclass=ABCMeta):
+    """A flat buffer of one byte per square, indexed by row * columns +
+    column, whose rows are filled the first time one of their squares is
+    read or written.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    """
+
+    def __init__(self, rows, columns):
+        super().__init__(rows * columns)
+        self.rows = rows
+        self.columns = columns
+        self.loaded_rows = bytearray(rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            self.ensure_row(index // self.columns)
+        else:
+            self.load_all()
+        return super().__getitem__(index)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, int):
+            self.ensure_row(index // self.columns)
+        else:
+            self.load_all()
+        super().__setitem__(index, value)
+
+    def ensure_row(self, row):
+        """Fills a row if it was not filled yet.
+
+        Parameters
+        ----------
+        row : int
+            The row of the board
+        """
+
+        if not self.loaded_rows[row]:
+            self.loaded_rows[row] = 1
+            start = row * self.columns
+            super().__setitem__(slice(start, start + self.columns), self.load_row(row))
+
+    def load_all(self):
+        """Fills every row that was not filled yet, so the whole buffer can
+        be read directly."""
+
+        for row in range(self.rows):
+            self.ensure_row(row)
+
+    @abstractmethod
+    def load_row(self, row):
+        """Returns the content of a row.
+
+        Parameters
+        ----------
+        row : int
+            The row of the board
+
+        Returns
+        ----------
+        bytes
+            One byte per square of the row
+        """
+
+
+class SavedStates(LazyRows):
+    """The states of a saved game, decoded one row at a time.
+
+    Parameters
+    ----------
+    data : bytes
+        The data holding the packed states, usually a memory map
+    offset : int
+        The position of the packed states inside the data
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    """
+
+    def __init__(self, data, offset, rows, columns):
+        super().__init__(rows, columns)
+        self.data = data
+        self.offset = offset
+
+    def load_row(self, row):
+        """Decodes the states of a row.
+
+        Parameters
+        ----------
+        row : int
+            The row of the board
+
+        Returns
+        ----------
+        bytearray
+            The state of every square of the row
+        """
+
+        return unpack_cells(self.data, self.offset, row * self.columns, self.columns, 2)
+
+
+class SavedNumbers(LazyRows):
+    """The numbers of a saved game, counted one row at a time from the bombs
+    of the row and of the rows next to it.
+
+    Parameters
+    ----------
+    bombs : BombBitmap
+        The bombs of the game
+    """
+
+    def __init__(self, bombs):
+        super().__init__(bombs.rows, bombs.columns)
+        self.bombs = bombs
+
+    def load_row(self, row):
+        """Counts the bombs next to every square of a row. The bombs of a row
+        are read as one byte per square inside a single integer, so adding
+        the integer shifted by one byte either way counts the bombs next to
+        every square at once, without carries.
+
+        Parameters
+        ----------
+        row : int
+            The row of the board
+
+        Returns
+        ----------
+        bytearray
+            The numbers of the row, with BOMB on the bombs
+        """
+
+        columns = self.columns
+        row_mask = (1 << (8 * columns)) - 1
+        counts = 0
+        for neighbour_row in [row - 1, row, row + 1]:
+            if 0 <= neighbour_row < self.rows:
+                cells = int.from_bytes(self.bombs.get_row(neighbour_row), 'little')
+                counts += cells + (cells >> 8) + ((cells << 8) & row_mask)
+
+        row_numbers = bytearray(counts.to_bytes(columns, 'little'))
+        bomb_cells = self.bombs.get_row(row)
+        column = bomb_cells.find(1)
+        while column != -1:
+            row_numbers[column] = BOMB
+            column = bomb_cells.find(1, column + 1)
+        return row_numbers
+
+
+class ResumedGame(Game):
+    """A game resumed from a save file, reading its board from a memory map
+    of the file as it is played.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of the save file, usually a memory map
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the game
+    seed : int
+        The seed of the game
+    mode : str
+        One of the keys of MODES
+    """
+
+    def __init__(self, data, rows, columns, number_of_bombs, seed, mode):
+        self.data = data
+        self.mode = mode
+        super().__init__(rows, columns, number_of_bombs, seed=seed)
+
+        bombs = BombBitmap(data, HEADER.size, rows, columns, number_of_bombs)
+        self.bombs = bombs
+        self.bomb_mask = bombs
+        self.numbers = SavedNumbers(bombs)
+        self.started = True
+
+    def init_matrix_state(self):
+        """Attaches the saved states, which are decoded as they are read."""
+
+        states_offset = HEADER.size + (self.rows * self.columns + 7) // 8
+        self.states = SavedStates(self.data, states_offset, self.rows, self.columns)
+
+        self.number_of_opened_squares = 0
+        self.number_of_flags = 0
+        self.number_of_marks = 0
+
+    def scan_counters(self):
+        """Counts unopened squares without bombs, flags and question marks by
+        decoding and scanning the whole board.
+
+        Returns
+        ----------
+        tuple
+            A tuple of three integers: the number of unopened squares without
+            a bomb, the number of flags and the number of question marks
+        """
+
+        self.states.load_all()
+        return super().scan_counters()
+
+    def view_states(self):
+        """Returns the states of the board without copying them, decoding
+        first the rows that were not read yet.
+
+        Returns
+        ----------
+        memoryview
+            A two-dimensional view of the states, indexed by [row, column]
+        """
+
+        self.states.load_all()
+        return super().view_states()
+
+    def view_numbers(self):
+        """Returns the numbers of the board without copying them, counting
+        first the rows that were not read yet.
+
+        Returns
+        ----------
+        memoryview
+            A two-dimensional view of the numbers, indexed by [row, column]
+        """
+
+        self.numbers.load_all()
+        return super().view_numbers()
+
+    def release_file(self):
+        """Decodes the remaining states, copies the bombs into memory and
+        closes the memory map of the save file, so the file can be replaced."""
+
+        if not isinstance(self.data, mmap.mmap):
+            return
+
+        self.states.load_all()
+        data = bytes(self.data[:HEADER.size + (self.rows * self.columns + 7) // 8])
+        self.data.close()
+        self.data = data
+        self.bombs.data = data
+        self.states.data = data
+
+
+def save_game(game, path, elapsed_milliseconds=0, total_seconds=0):
+    """Writes a started game to a file. The file is written next to the
+    given path and then moved over it. A resumed game first releases the
+    memory map of its own file, which could not be replaced while mapped on
+    every platform.
+
+    Parameters
+    ----------
+    game : Game
+        A started game
+    path : str
+        The path of the file
+    elapsed_milliseconds : int
+        The time played so far
+    total_seconds : int
+        The time limit of the game, 0 if it has none
+
+    Raises
+    ----------
+    ValueError
+        If the round of the game was not started
+    """
+
+    if not game.started:
+        raise ValueError('Only a started game can be saved')
+
+    rows = game.rows
+    columns = game.columns
+    bomb_bitmap = bytearray((rows * columns + 7) // 8)
+    for position in game.bombs:
+        bomb_bitmap[position >> 3] |= 1 << (position & 7)
+    states = pack_cells(game.view_states(), 2)
+    replay_data = game.replay_log.to_bytes() if game.replay_log is not None else b''
+
+    if isinstance(game, ResumedGame):
+        mode = game.mode
+    else:
+        mode = 'no_guess' if isinstance(game, NoGuessGame) else 'classic'
+    header = HEADER.pack(MAGIC, rows, columns, game.number_of_bombs, game.seed, MODES[mode], game.finished,
+                         game.won, game.number_of_opened_squares, game.number_of_flags, game.number_of_marks,
+                         elapsed_milliseconds, total_seconds, len(replay_data))
+
+    if isinstance(game, ResumedGame):
+        game.release_file()
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(header)
+        file.write(bomb_bitmap)
+        file.write(states)
+        file.write(replay_data)
+    os.replace(temporary_path, path)
+
+
+def load_game(path):
+    """Resumes a game saved by save_game. The file is memory-mapped and only
+    its header and replay log are read up front.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file
+
+    Returns
+    ----------
+    tuple
+        A tuple of the ResumedGame, the time played so far in milliseconds,
+        and the time limit of the game in seconds, 0 if it has none
+
+    Raises
+    ----------
+    ValueError
+        If the file is not a saved game
+    """
+
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a saved minesweeper game')
+
+    (_, rows, columns, number_of_bombs, seed, mode, finished, won, number_of_opened_squares, number_of_flags,
+     number_of_marks, elapsed_milliseconds, total_seconds, replay_length) = HEADER.unpack_from(data)
+    bombs_offset = HEADER.size
+    states_offset = bombs_offset + (rows * columns + 7) // 8
+    replay_offset = states_offset + (rows * columns + 3) // 4
+    if len(data) != replay_offset + replay_length:
+        raise ValueError('Saved game is truncated')
+
+    modes = {code: name for name, code in MODES.items()}
+    game = ResumedGame(data, rows, columns, number_of_bombs, seed, modes[mode])
+    game.number_of_opened_squares = number_of_opened_squares
+    game.number_of_flags = number_of_flags
+    game.number_of_marks = number_of_marks
+    game.finished = bool(finished)
+    game.won = bool(won)
+    if replay_length:
+        game.replay_log = ReplayLog.from_bytes(data[replay_offset:])
+    else:
+        game.replay_log = ReplayLog(rows, columns, number_of_bombs, seed, modes[mode])
+
+    return game, elapsed_milliseconds, total_seconds
@@ -0,0 +1,1067 @@
+"""This module serves many headless games of minesweeper from a single
+process, for tournaments and bots. Clients connect over TCP or a Unix socket
+and send one JSON request per line; every request gets one JSON response
+per line, in order.
+
+    {"id": 1, "command": "new", "rows": 16, "columns": 30, "bombs": 99, "time_limit": 300}
+    {"id": 1, "ok": true, "session": 0, ...}
+    {"id": 2, "command": "start", "session": 0, "row": 8, "column": 15}
+    {"id": 2, "ok": true, "opened": [[8, 15, 0], ...], "finished": false, ...}
+
+The commands are 'new', 'start', 'click', 'chord', 'reveal', 'flag',
+'mark', 'state', 'close', 'stats', 'watch' and 'unwatch'. Sessions do not
+belong to a connection, so a bot can reconnect and continue its games;
+sessions left idle are evicted.
+
+A connection that watches a session gets a compressed snapshot of the board
+in the response, then a 'delta' event line every tick the board changed:
+
+    {"event": "delta", "session": 0, "tick": 3, "cells": [40, 4, 1, 5, ...], ...}
+
+A cell is encoded as its state, or as 4 plus its number once it is opened,
+and the cells of a delta are pairs of the gap to the previous changed index
+and the new value. A delta is encoded once and the same bytes are written to
+every spectator; a spectator that falls behind is disconnected.
+
+A connection is served one request at a time and its responses are written
+with flow control, so a client that does not read its responses stops being
+read from, and one that stalls is disconnected.
+
+    python server.py --port 8765
+    python server.py --unix /tmp/minesweeper.sock
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+import zlib
+from base64 import b64decode, b64encode
+from collections import deque
+
+from engine import Game, STATES
+from noguess import NoGuessGame
+
+TUPLE_SIZE = sys.getsizeof((0, 0))
+
+MAXIMUM_REQUEST_LENGTH = 1 << 22
+
+MAXIMUM_RESPONSE_LENGTH = 1 << 26
+
+WRITE_BUFFER_LIMIT = 1 << 16
+
+SPECTATOR_BUFFER_LIMIT = 1 << 20
+
+OPENED_CELL = 4
+
+
+class Session:
+    """A headless game with its countdown.
+
+    Parameters
+    ----------
+    game : Game
+        The game of the session
+    time_limit : float
+        The number of seconds the round lasts after it is started, 0 for no
+        limit
+    clock : callable
+        Returns the current time in seconds
+    """
+
+    def __init__(self, game, time_limit=0, clock=time.monotonic):
+        self.game = game
+        self.time_limit = time_limit
+        self.clock = clock
+        self.started_at = None
+        self.last_used = clock()
+
+        self.busy = False
+
+        self.watchers = set()
+        self.tick = 0
+        self.reported_finished = False
+
+    @property
+    def seconds_left(self):
+        """float: The time left to play, None if the round has no limit or
+        was not started."""
+
+        if not self.time_limit or self.started_at is None:
+            return None
+        return max(0.0, self.time_limit - (self.clock() - self.started_at))
+
+    def check_time(self):
+        """Finishes the game if its time expired."""
+
+        if self.seconds_left == 0.0 and not self.game.finished:
+            self.game.time_over()
+
+    def memory_usage(self):
+        """Estimates the memory taken by the board of the session.
+
+        Returns
+        ----------
+        int
+            The approximate number of bytes of the buffers, the bombs, the
+            layout and the labeled regions of the game
+        """
+
+        game = self.game
+        size = sys.getsizeof(game.states) + sys.getsizeof(game.numbers)
+        size += sys.getsizeof(game.bombs) + sys.getsizeof(game.bomb_mask)
+        if game.layout is not None:
+            size += sys.getsizeof(game.layout) + sys.getsizeof(game.layout_numbers)
+        size += sys.getsizeof(game.zero_region_labels)
+        for region in game.zero_regions:
+            size += sys.getsizeof(region) + len(region) * TUPLE_SIZE
+        return size
+
+    def describe(self):
+        """Summarizes the state of the session.
+
+        Returns
+        ----------
+        dict
+            The size of the board, the state of the game, its counters and
+            the time left
+        """
+
+        game = self.game
+        return {'rows': game.rows, 'columns': game.columns, 'bombs': game.number_of_bombs,
+                'started': game.started, 'finished': game.finished, 'won': game.won,
+                'opened_squares': game.number_of_opened_squares, 'flags': game.number_of_placed_flags,
+                'seconds_left': self.seconds_left}
+
+    def encode_cell(self, index):
+        """Encodes a square the way spectators see it.
+
+        Parameters
+        ----------
+        index : int
+            The position of the square, row * columns + column
+
+        Returns
+        ----------
+        int
+            The state of the square, or OPENED_CELL plus its number if it was
+            opened
+        """
+
+        state = self.game.states[index]
+        if state == STATES['unblocked']:
+            return OPENED_CELL + self.game.numbers[index]
+        return state
+
+    def encode_snapshot(self):
+        """Encodes the whole board for a new spectator.
+
+        Returns
+        ----------
+        str
+            The encoded cells of the board, compressed with zlib and encoded
+            in base64
+        """
+
+        game = self.game
+        if not game.started:
+            cells = bytes(game.rows * game.columns)
+        else:
+            cells = bytes(state if state != STATES['unblocked'] else OPENED_CELL + number
+                          for state, number in zip(game.states, game.numbers))
+        return b64encode(zlib.compress(cells)).decode()
+
+    def encode_delta(self, session_id):
+        """Encodes the squares changed since the last delta as an event line,
+        and starts collecting the next ones.
+
+        Parameters
+        ----------
+        session_id : int
+            The id of the session
+
+        Returns
+        ----------
+        bytes
+            The event line, None if nothing changed
+        """
+
+        game = self.game
+        newly_finished = game.finished and not self.reported_finished
+        if not game.dirty_squares and not newly_finished:
+            return None
+
+        columns = game.columns
+        indexes = sorted(row * columns + column for row, column in game.dirty_squares)
+        game.dirty_squares = set()
+
+        cells = []
+        previous_index = 0
+        for index in indexes:
+            cells.append(index - previous_index)
+            cells.append(self.encode_cell(index))
+            previous_index = index
+
+        self.tick += 1
+        event = {'event': 'delta', 'session': session_id, 'tick': self.tick, 'cells': cells,
+                 'opened_squares': game.number_of_opened_squares, 'flags': game.number_of_placed_flags}
+        if newly_finished:
+            self.reported_finished = True
+            event.update({'finished': True, 'won': game.won})
+            if not game.won:
+                event['bombs'] = sorted(game.bombs)
+        return json.dumps(event, separators=(',', ':')).encode() + b'\n'
+
+
+class GameServer:
+    """The sessions of a server and the handling of their requests.
+
+    Parameters
+    ----------
+    idle_timeout : float
+        The number of seconds after which an unused session is evicted
+    maximum_sessions : int
+        The number of sessions that can exist at once
+    maximum_squares : int
+        The number of squares of the largest board, which bounds the time a
+        single request can hold the event loop; the rounds of no-guess
+        games are generated in a worker thread instead, because repairing
+        their bombs can take much longer
+    write_timeout : float
+        The number of seconds a client may take to accept a response before
+        it is disconnected
+    tick_interval : float
+        The number of seconds between two deltas sent to spectators
+    clock : callable
+        Returns the current time in seconds
+    """
+
+    def __init__(self, idle_timeout=300.0, maximum_sessions=10000, maximum_squares=250000, write_timeout=10.0,
+                 tick_interval=0.05, clock=time.monotonic):
+        self.idle_timeout = idle_timeout
+        self.maximum_sessions = maximum_sessions
+        self.maximum_squares = maximum_squares
+        self.write_timeout = write_timeout
+        self.tick_interval = tick_interval
+        self.clock = clock
+
+        self.sessions = {}
+        self.session_ids = itertools.count()
+        self.number_of_connections = 0
+        self.number_of_evicted_sessions = 0
+        self.watched_sessions = {}
+
+        self.commands = {'new': self.create_session, 'start': self.start_round, 'click': self.click_square,
+                         'chord': self.chord_square, 'reveal': self.reveal_squares, 'flag': self.place_flag,
+                         'mark': self.place_question_mark, 'state': self.get_state, 'close': self.close_session,
+                         'stats': self.get_stats}
+        self.connection_commands = {'watch': self.watch_session, 'unwatch': self.unwatch_session}
+
+    def handle_request(self, request, writer=None):
+        """Runs a request and builds its response.
+
+        Parameters
+        ----------
+        request : dict
+            The decoded request, with its 'command' and arguments
+        writer : StreamWriter
+            The stream of the connection that made the request, needed to
+            watch sessions
+
+        Returns
+        ----------
+        dict
+            The response, with 'ok' set to False and an 'error' message if the
+            request failed
+        """
+
+        response = {'id': request.get('id')} if isinstance(request, dict) else {'id': None}
+        try:
+            command = request.get('command') if isinstance(request, dict) else None
+            if command in self.connection_commands:
+                if writer is None:
+                    raise ValueError('Watching needs a connection')
+                response.update(self.connection_commands[command](request, writer))
+            elif command in self.commands:
+                response.update(self.commands[command](request))
+            else:
+                raise ValueError('Unknown command')
+            response['ok'] = True
+        except (KeyError, TypeError, ValueError) as error:
+            response['ok'] = False
+            response['error'] = str(error) if not isinstance(error, KeyError) else f'Missing argument {error}'
+        return response
+
+    def get_session(self, request):
+        """Returns the session a request is made on, and marks it as used.
+
+        Parameters
+        ----------
+        request : dict
+            A request with a 'session' argument
+
+        Returns
+        ----------
+        Session
+            The session
+
+        Raises
+        ----------
+        ValueError
+            If there is no such session
+        """
+
+        session = self.find_session(request)
+        if session is None:
+            raise ValueError('Unknown session')
+        session.last_used = self.clock()
+        session.check_time()
+        return session
+
+    def get_playable_game(self, request):
+        """Returns the game of a request's session, checking that it can be
+        played on the requested square.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        tuple
+            A tuple of the session and the coordinates of the square
+
+        Raises
+        ----------
+        ValueError
+            If the round was not started, the game is finished or the square
+            is outside the board
+        """
+
+        session = self.get_session(request)
+        if not session.game.started:
+            raise ValueError('Round not started')
+        if session.game.finished:
+            raise ValueError('Game is finished')
+        return session, self.get_square(session.game, request['row'], request['column'])
+
+    @staticmethod
+    def get_square(game, row, column):
+        """Validates the coordinates of a square.
+
+        Parameters
+        ----------
+        game : Game
+            The game the square belongs to
+        row : int
+            The row of the square
+        column : int
+            The column of the square
+
+        Returns
+        ----------
+        tuple
+            Tuple that represents the coordinates of the square
+
+        Raises
+        ----------
+        ValueError
+            If the coordinates are not integers inside the board
+        """
+
+        if isinstance(row, bool) or isinstance(column, bool) or not isinstance(row, int) or \
+                not isinstance(column, int) or not game.is_inside_matrix((row, column)):
+            raise ValueError('Square outside the board')
+        return row, column
+
+    @staticmethod
+    def get_result(session, opened_squares):
+        """Builds the response of an action that opens squares.
+
+        Parameters
+        ----------
+        session : Session
+            The session the action was made on
+        opened_squares : list
+            A list of tuples representing coordinates of the opened squares
+
+        Returns
+        ----------
+        dict
+            The opened squares with their numbers, and the state of the game
+        """
+
+        game = session.game
+        result = {'opened': [[row, column, game.get_square_number(row, column)] for row, column in opened_squares]}
+        result.update(session.describe())
+        return result
+
+    def create_session(self, request):
+        """Creates a session with a new game.
+
+        Parameters
+        ----------
+        request : dict
+            A request with the 'rows', 'columns' and 'bombs' of the board, and
+            optionally a 'seed', an integer or a string, 'no_guess' and a
+            'time_limit' in seconds
+
+        Returns
+        ----------
+        dict
+            The id of the session and its state
+
+        Raises
+        ----------
+        ValueError
+            If an argument has the wrong type or is out of range
+        """
+
+        rows, columns, number_of_bombs = request['rows'], request['columns'], request['bombs']
+        for number in [rows, columns, number_of_bombs]:
+            if not isinstance(number, int) or isinstance(number, bool) or number < 1:
+                raise ValueError('Rows, columns and bombs must be positive integers')
+        time_limit = request.get('time_limit', 0)
+        if not isinstance(time_limit, (int, float)) or isinstance(time_limit, bool) or \
+                not 0 <= time_limit < float('inf'):
+            raise ValueError('The time limit must be a non-negative number of seconds')
+        seed = request.get('seed')
+        if seed is not None and (not isinstance(seed, (int, str)) or isinstance(seed, bool)):
+            raise ValueError('The seed must be an integer or a string')
+        if rows * columns > self.maximum_squares:
+            raise ValueError('Board too large')
+        if number_of_bombs > rows * columns - 9:
+            raise ValueError('Too many bombs')
+        if len(self.sessions) >= self.maximum_sessions:
+            raise ValueError('Too many sessions')
+
+        game_class = NoGuessGame if request.get('no_guess') else Game
+        game = game_class(rows, columns, number_of_bombs, seed=seed)
+        session_id = next(self.session_ids)
+        self.sessions[session_id] = Session(game, time_limit, self.clock)
+
+        result = {'session': session_id, 'seed': game.seed}
+        result.update(self.sessions[session_id].describe())
+        return result
+
+    def start_round(self, request):
+        """Starts the round of a session from a square and its countdown.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        dict
+            The opened squares and the state of the game
+        """
+
+        session = self.get_session(request)
+        if session.game.started:
+            raise ValueError('Round already started')
+        square_coords = self.get_square(session.game, request['row'], request['column'])
+        opened_squares = session.game.start_round(square_coords)
+        session.started_at = self.clock()
+        return self.get_result(session, opened_squares)
+
+    def click_square(self, request):
+        """Opens a square.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        dict
+            The opened squares and the state of the game
+        """
+
+        session, square_coords = self.get_playable_game(request)
+        return self.get_result(session, session.game.click_square(square_coords))
+
+    def chord_square(self, request):
+        """Opens the neighbours of an opened number whose flags match it.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        dict
+            The opened squares and the state of the game
+        """
+
+        session, square_coords = self.get_playable_game(request)
+        return self.get_result(session, session.game.chord_square(square_coords))
+
+    def reveal_squares(self, request):
+        """Opens a batch of squares as a single action.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session' and 'squares', a list of [row, column]
+
+        Returns
+        ----------
+        dict
+            The opened squares and the state of the game
+        """
+
+        session = self.get_session(request)
+        if not session.game.started or session.game.finished:
+            raise ValueError('Round not started' if not session.game.started else 'Game is finished')
+        squares = request['squares']
+        if not isinstance(squares, list) or not all(isinstance(square, list) and len(square) == 2
+                                                    for square in squares):
+            raise ValueError('Squares must be a list of [row, column] pairs')
+        squares = [self.get_square(session.game, row, column) for row, column in squares]
+        return self.get_result(session, session.game.reveal_squares(squares))
+
+    def place_flag(self, request):
+        """Places or removes a flag.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        dict
+            Whether the square changed, and the state of the game
+        """
+
+        session, square_coords = self.get_playable_game(request)
+        result = {'changed': session.game.place_or_erase_flag_on_square(square_coords)}
+        result.update(session.describe())
+        return result
+
+    def place_question_mark(self, request):
+        """Places or removes a question mark.
+
+        Parameters
+        ----------
+        request : dict
+            A request with 'session', 'row' and 'column' arguments
+
+        Returns
+        ----------
+        dict
+            Whether the square changed, and the state of the game
+        """
+
+        session, square_coords = self.get_playable_game(request)
+        result = {'changed': session.game.place_or_erase_question_mark_on_square(square_coords)}
+        result.update(session.describe())
+        return result
+
+    def get_state(self, request):
+        """Describes a session.
+
+        Parameters
+        ----------
+        request : dict
+            A request with a 'session' argument
+
+        Returns
+        ----------
+        dict
+            The state of the game and the memory taken by the session
+        """
+
+        session = self.get_session(request)
+        result = session.describe()
+        result['completed'] = session.game.is_game_completed()
+        result['memory'] = session.memory_usage()
+        return result
+
+    def close_session(self, request):
+        """Deletes a session.
+
+        Parameters
+        ----------
+        request : dict
+            A request with a 'session' argument
+
+        Returns
+        ----------
+        dict
+            An empty dict
+        """
+
+        self.get_session(request)
+        self.delete_session(request['session'])
+        return {}
+
+    def delete_session(self, session_id):
+        """Deletes a session, letting its spectators know.
+
+        Parameters
+        ----------
+        session_id : int
+            The id of the session
+        """
+
+        session = self.sessions.pop(session_id)
+        if session.watchers:
+            del self.watched_sessions[session_id]
+            event = json.dumps({'event': 'closed', 'session': session_id}).encode() + b'\n'
+            for writer in session.watchers:
+                writer.write(event)
+
+    def watch_session(self, request, writer):
+        """Subscribes a connection to the changes of a session.
+
+        Parameters
+        ----------
+        request : dict
+            A request with a 'session' argument
+        writer : StreamWriter
+            The stream the deltas will be written to
+
+        Returns
+        ----------
+        dict
+            The size of the board, the snapshot of its cells and the tick the
+            following deltas start from
+        """
+
+        session_id = request['session']
+        session = self.get_session(request)
+        if not session.watchers:
+            session.game.dirty_squares = set()
+            self.watched_sessions[session_id] = session
+        session.watchers.add(writer)
+
+        result = session.describe()
+        result.update({'snapshot': session.encode_snapshot(), 'tick': session.tick})
+        return result
+
+    def unwatch_session(self, request, writer):
+        """Unsubscribes a connection from the changes of a session.
+
+        Parameters
+        ----------
+        request : dict
+            A request with a 'session' argument
+        writer : StreamWriter
+            The stream the deltas were written to
+
+        Returns
+        ----------
+        dict
+            An empty dict
+        """
+
+        session = self.sessions.get(request['session'])
+        if session is None or writer not in session.watchers:
+            raise ValueError('Session not watched')
+        self.remove_watcher(request['session'], writer)
+        return {}
+
+    def remove_watcher(self, session_id, writer):
+        """Stops sending the changes of a session to a stream, and stops
+        collecting them when nobody watches.
+
+        Parameters
+        ----------
+        session_id : int
+            The id of the session
+        writer : StreamWriter
+            The stream of the spectator
+        """
+
+        session = self.watched_sessions[session_id]
+        session.watchers.discard(writer)
+        if not session.watchers:
+            session.game.dirty_squares = None
+            del self.watched_sessions[session_id]
+
+    def broadcast_deltas(self):
+        """Writes the changes of every watched session to its spectators.
+        Each delta is encoded once, and spectators whose streams hold too
+        much unsent data are disconnected. Sessions whose round is being
+        generated are skipped, and a session that fails to encode its delta
+        loses its spectators instead of stopping the others.
+
+        Returns
+        ----------
+        int
+            The number of deltas sent
+        """
+
+        number_of_deltas = 0
+        for session_id, session in list(self.watched_sessions.items()):
+            if session.busy:
+                continue
+            try:
+                session.check_time()
+                event = session.encode_delta(session_id)
+            except Exception:
+                for writer in list(session.watchers):
+                    writer.close()
+                    self.remove_watcher(session_id, writer)
+                continue
+            if event is None:
+                continue
+
+            number_of_deltas += 1
+            for writer in list(session.watchers):
+                if writer.is_closing() or writer.transport.get_write_buffer_size() > SPECTATOR_BUFFER_LIMIT:
+                    writer.close()
+                    self.remove_watcher(session_id, writer)
+                else:
+                    writer.write(event)
+        return number_of_deltas
+
+    async def run_broadcast(self):
+        """Sends the deltas of the watched sessions every tick, until
+        cancelled."""
+
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.broadcast_deltas()
+
+    def get_stats(self, request):
+        """Describes the server.
+
+        Parameters
+        ----------
+        request : dict
+            A request without arguments
+
+        Returns
+        ----------
+        dict
+            The number of sessions, connections and evicted sessions, and the
+            memory taken by all sessions
+        """
+
+        return {'sessions': len(self.sessions), 'connections': self.number_of_connections,
+                'evicted_sessions': self.number_of_evicted_sessions,
+                'watched_sessions': len(self.watched_sessions),
+                'memory': sum(session.memory_usage() for session in self.sessions.values())}
+
+    def evict_idle_sessions(self):
+        """Deletes the sessions unused for longer than the idle timeout.
+
+        Returns
+        ----------
+        int
+            The number of deleted sessions
+        """
+
+        oldest_allowed = self.clock() - self.idle_timeout
+        idle_sessions = [session_id for session_id, session in self.sessions.items()
+                         if session.last_used < oldest_allowed and not session.busy]
+        for session_id in idle_sessions:
+            self.delete_session(session_id)
+        self.number_of_evicted_sessions += len(idle_sessions)
+        return len(idle_sessions)
+
+    async def run_eviction(self, interval):
+        """Evicts idle sessions periodically, until cancelled.
+
+        Parameters
+        ----------
+        interval : float
+            The number of seconds between two evictions
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle_sessions()
+
+    def find_session(self, request):
+        """Returns the session named by a request, without checking it.
+
+        Parameters
+        ----------
+        request : dict
+            The decoded request
+
+        Returns
+        ----------
+        Session
+            The session, None if the request does not name an existing one
+        """
+
+        try:
+            return self.sessions.get(request.get('session'))
+        except (AttributeError, TypeError):
+            return None
+
+    async def run_request(self, request, writer):
+        """Runs a request, starting the rounds of no-guess games in a worker
+        thread so the other sessions are served meanwhile. A session is busy
+        while its round is being generated and refuses other requests.
+
+        Parameters
+        ----------
+        request : dict
+            The decoded request
+        writer : StreamWriter
+            The stream of the connection that made the request
+
+        Returns
+        ----------
+        dict
+            The response
+        """
+
+        session = self.find_session(request)
+        if session is None:
+            return self.handle_request(request, writer)
+        if session.busy:
+            return {'id': request.get('id'), 'ok': False, 'error': 'Session busy'}
+        if request.get('command') != 'start' or not isinstance(session.game, NoGuessGame) or session.game.started:
+            return self.handle_request(request, writer)
+
+        session.busy = True
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.handle_request, request, writer)
+        finally:
+            session.busy = False
+
+    async def handle_connection(self, reader, writer):
+        """Serves the requests of a connection, one at a time, until it is
+        closed or too slow to accept its responses.
+
+        Parameters
+        ----------
+        reader : StreamReader
+            The stream the requests are read from
+        writer : StreamWriter
+            The stream the responses are written to
+        """
+
+        self.number_of_connections += 1
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_LIMIT)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b'{"id":null,"ok":false,"error":"Request too long"}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {'id': None, 'ok': False, 'error': 'Invalid JSON'}
+                else:
+                    response = await self.run_request(request, writer)
+
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.number_of_connections -= 1
+            for session_id, session in list(self.watched_sessions.items()):
+                if writer in session.watchers:
+                    self.remove_watcher(session_id, writer)
+            writer.close()
+
+    async def serve(self, host=None, port=None, path=None, eviction_interval=None):
+        """Serves clients on a TCP port, or on a Unix socket if a path is
+        given, until cancelled.
+
+        Parameters
+        ----------
+        host : str
+            The host of the TCP server
+        port : int
+            The port of the TCP server
+        path : str
+            The path of the Unix socket
+        eviction_interval : float
+            The number of seconds between two evictions; a quarter of the idle
+            timeout if None
+        """
+
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path, limit=MAXIMUM_REQUEST_LENGTH)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAXIMUM_REQUEST_LENGTH)
+
+        if eviction_interval is None:
+            eviction_interval = self.idle_timeout / 4
+        eviction = asyncio.ensure_future(self.run_eviction(eviction_interval))
+        broadcast = asyncio.ensure_future(self.run_broadcast())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            eviction.cancel()
+            broadcast.cancel()
+
+
+def decode_snapshot(snapshot):
+    """Decodes the snapshot of a watched board.
+
+    Parameters
+    ----------
+    snapshot : str
+        The snapshot from the response to 'watch'
+
+    Returns
+    ----------
+    bytearray
+        The encoded cells of the board, row by row
+    """
+
+    return bytearray(zlib.decompress(b64decode(snapshot)))
+
+
+def apply_delta(cells, event):
+    """Updates the cells of a watched board with a delta.
+
+    Parameters
+    ----------
+    cells : bytearray
+        The encoded cells of the board, row by row
+    event : dict
+        A 'delta' event
+    """
+
+    index = 0
+    delta = event['cells']
+    for position in range(0, len(delta), 2):
+        index += delta[position]
+        cells[index] = delta[position + 1]
+
+
+class Client:
+    """A client of the server, sending one request at a time. Events of
+    watched sessions that arrive before a response are kept for read_event.
+
+    Parameters
+    ----------
+    reader : StreamReader
+        The stream the responses are read from
+    writer : StreamWriter
+        The stream the requests are written to
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.request_ids = itertools.count()
+        self.events = deque()
+
+    @classmethod
+    async def connect(cls, host=None, port=None, path=None):
+        """Connects to a server on a TCP port, or on a Unix socket if a path
+        is given.
+
+        Parameters
+        ----------
+        host : str
+            The host of the TCP server
+        port : int
+            The port of the TCP server
+        path : str
+            The path of the Unix socket
+
+        Returns
+        ----------
+        Client
+            The connected client
+        """
+
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path, limit=MAXIMUM_RESPONSE_LENGTH)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=MAXIMUM_RESPONSE_LENGTH)
+        return cls(reader, writer)
+
+    async def call(self, command, **arguments):
+        """Sends a request and waits for its response.
+
+        Parameters
+        ----------
+        command : str
+            The command of the request
+        arguments : dict
+            The arguments of the command
+
+        Returns
+        ----------
+        dict
+            The response
+        """
+
+        request = {'id': next(self.request_ids), 'command': command}
+        request.update(arguments)
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        while True:
+            message = json.loads(await self.reader.readline())
+            if 'event' not in message:
+                return message
+            self.events.append(message)
+
+    async def read_event(self):
+        """Waits for the next event of the watched sessions.
+
+        Returns
+        ----------
+        dict
+            The event, None if the connection was closed
+        """
+
+        if self.events:
+            return self.events.popleft()
+        line = await self.reader.readline()
+        return json.loads(line) if line else None
+
+    async def close(self):
+        """Closes the connection."""
+
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def main(arguments):
+    """Runs the server from the command line.
+
+    Parameters
+    ----------
+    arguments : list
+        The command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='serve on this Unix socket instead of TCP')
+    parser.add_argument('--idle-timeout', type=float, default=300.0)
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--max-squares', type=int, default=250000)
+    parser.add_argument('--write-timeout', type=float, default=10.0)
+    options = parser.parse_args(arguments)
+
+    server = GameServer(options.idle_timeout, options.max_sessions, options.max_squares, options.write_timeout)
+    try:
+        asyncio.run(server.serve(options.host, options.port, options.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
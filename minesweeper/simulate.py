@@ -0,0 +1,309 @@
+"""This module plays many games of minesweeper without a display and reports
+how often a strategy wins. The games are spread over a pool of worker
+processes and played with the rules of the engine.
+
+A strategy is a callable that is given a started game and a random
+generator, and returns a function that picks the next square to click from
+the squares opened by the previous click. The built-in strategies are
+'random' and 'solver'; any other strategy is given as 'module:callable'.
+
+    python simulate.py --rows 16 --columns 30 --bombs 99 --games 1000 --strategy solver
+"""
+
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from engine import Game, STATES
+from noguess import NoGuessGame
+from solver import Solver
+
+PHASES = ['generate', 'decide', 'click']
+
+
+def get_random_unknown_square(game, generator, excluded_squares=()):
+    """Picks a random square that is not opened.
+
+    Parameters
+    ----------
+    game : Game
+        A started game
+    generator : Random
+        The random generator
+    excluded_squares : set
+        Squares that must not be picked
+
+    Returns
+    ----------
+    tuple
+        Tuple that represents the coordinates of the square
+    """
+
+    while True:
+        square_coords = generator.randrange(game.rows), generator.randrange(game.columns)
+        if game.get_square_state(*square_coords) != STATES['unblocked'] and square_coords not in excluded_squares:
+            return square_coords
+
+
+def random_strategy(game, generator):
+    """Clicks random squares that are not opened.
+
+    Parameters
+    ----------
+    game : Game
+        A started game
+    generator : Random
+        The random generator of the game
+
+    Returns
+    ----------
+    callable
+        A function that returns the next square to click
+    """
+
+    def next_square(opened_squares):
+        return get_random_unknown_square(game, generator)
+
+    return next_square
+
+
+def solver_strategy(game, generator):
+    """Clicks the squares the solver proves safe, and when there are none,
+    the square least likely to hold a bomb.
+
+    Parameters
+    ----------
+    game : Game
+        A started game
+    generator : Random
+        The random generator of the game
+
+    Returns
+    ----------
+    callable
+        A function that returns the next square to click
+    """
+
+    solver = Solver(game)
+    safe_squares = []
+
+    def next_square(opened_squares):
+        solver.observe(opened_squares)
+        while safe_squares:
+            square_coords = safe_squares.pop()
+            if game.get_square_state(*square_coords) != STATES['unblocked']:
+                return square_coords
+
+        # The bombs found make the numbers around them stale, so the solver
+        # runs again until it proves safe squares or proves nothing more.
+        found_safe_squares, found_mine_squares = solver.solve()
+        while not found_safe_squares and found_mine_squares:
+            found_safe_squares, found_mine_squares = solver.solve()
+        if found_safe_squares:
+            safe_squares.extend(found_safe_squares)
+            return safe_squares.pop()
+
+        if solver.probabilities:
+            return min(solver.probabilities, key=solver.probabilities.get)
+        return get_random_unknown_square(game, generator, solver.known_mines)
+
+    return next_square
+
+
+STRATEGIES = {'random': random_strategy, 'solver': solver_strategy}
+
+
+def load_strategy(name):
+    """Returns a built-in strategy, or imports one given as
+    'module:callable'.
+
+    Parameters
+    ----------
+    name : str
+        The name of the strategy
+
+    Returns
+    ----------
+    callable
+        The strategy
+    """
+
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module_name, _, callable_name = name.partition(':')
+    return getattr(importlib.import_module(module_name), callable_name)
+
+
+def play_games(rows, columns, number_of_bombs, no_guess, strategy_name, seeds):
+    """Plays one game per seed, clicking the middle of the board first.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the board
+    no_guess : bool
+        If True, the boards can be won without guessing
+    strategy_name : str
+        The name of the strategy, see load_strategy
+    seeds : list
+        The seeds of the games
+
+    Returns
+    ----------
+    tuple
+        A tuple of the number of games won, the number of moves and a dict
+        with the time spent in every phase, in seconds
+    """
+
+    strategy = load_strategy(strategy_name)
+    game_class = NoGuessGame if no_guess else Game
+    won = 0
+    number_of_moves = 0
+    phase_times = dict.fromkeys(PHASES, 0.0)
+
+    for seed in seeds:
+        start_time = perf_counter()
+        game = game_class(rows, columns, number_of_bombs, seed=seed)
+        opened_squares = game.start_round((rows // 2, columns // 2))
+        phase_times['generate'] += perf_counter() - start_time
+
+        next_square = strategy(game, random.Random(seed))
+        for _ in range(rows * columns):
+            if game.finished:
+                break
+            start_time = perf_counter()
+            square_coords = next_square(opened_squares)
+            decided_time = perf_counter()
+            opened_squares = game.click_square(square_coords)
+            phase_times['decide'] += decided_time - start_time
+            phase_times['click'] += perf_counter() - decided_time
+            number_of_moves += 1
+
+        won += game.is_game_completed()
+    return won, number_of_moves, phase_times
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """Computes the Wilson score interval of a proportion.
+
+    Parameters
+    ----------
+    successes : int
+        The number of successes
+    trials : int
+        The number of trials
+    z : float
+        The quantile of the normal distribution, 1.96 for 95%
+
+    Returns
+    ----------
+    tuple
+        The lower and the upper bound of the interval
+    """
+
+    if trials == 0:
+        return 0.0, 1.0
+    proportion = successes / trials
+    denominator = 1 + z * z / trials
+    center = (proportion + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(proportion * (1 - proportion) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def simulate(rows, columns, number_of_bombs, number_of_games, strategy_name, no_guess=False, seed=0, workers=None,
+             chunk_size=50):
+    """Plays games in worker processes and gathers their results.
+
+    Parameters
+    ----------
+    rows : int
+        The number of rows of the board
+    columns : int
+        The number of columns of the board
+    number_of_bombs : int
+        The number of bombs of the board
+    number_of_games : int
+        The number of games to play
+    strategy_name : str
+        The name of the strategy, see load_strategy
+    no_guess : bool
+        If True, the boards can be won without guessing
+    seed : int
+        The seed of the first game; the next games use the following seeds
+    workers : int
+        The number of worker processes; the number of processors if None
+    chunk_size : int
+        The number of games given to a worker at once
+
+    Returns
+    ----------
+    dict
+        The number of games and of games won, the number of moves, the time
+        spent in every phase, in seconds, and the elapsed time
+    """
+
+    load_strategy(strategy_name)
+    seeds = list(range(seed, seed + number_of_games))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+    result = {'games': number_of_games, 'won': 0, 'moves': 0, 'phases': dict.fromkeys(PHASES, 0.0)}
+
+    start_time = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, rows, columns, number_of_bombs, no_guess, strategy_name, chunk)
+                   for chunk in chunks]
+        for future in futures:
+            won, number_of_moves, phase_times = future.result()
+            result['won'] += won
+            result['moves'] += number_of_moves
+            for phase in PHASES:
+                result['phases'][phase] += phase_times[phase]
+    result['elapsed'] = perf_counter() - start_time
+    return result
+
+
+def main(arguments):
+    """Runs a simulation from the command line and prints its report.
+
+    Parameters
+    ----------
+    arguments : list
+        The command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=16)
+    parser.add_argument('--columns', type=int, default=30)
+    parser.add_argument('--bombs', type=int, default=99)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--strategy', default='solver', help="'random', 'solver' or 'module:callable'")
+    parser.add_argument('--no-guess', action='store_true', help='play boards that can be won without guessing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50)
+    options = parser.parse_args(arguments)
+
+    result = simulate(options.rows, options.columns, options.bombs, options.games, options.strategy,
+                      options.no_guess, options.seed, options.workers, options.chunk_size)
+
+    games = result['games']
+    lower, upper = wilson_interval(result['won'], games)
+    print(f'{options.rows}x{options.columns}, {options.bombs} bombs, strategy {options.strategy}'
+          f'{", no guess" if options.no_guess else ""}')
+    print(f'won {result["won"]}/{games} = {result["won"] / games:.2%} (95% CI {lower:.2%} - {upper:.2%})')
+    print(f'{games / result["elapsed"]:.1f} games/s over {options.workers} workers, '
+          f'{result["moves"] / games:.1f} moves per game')
+    for phase in PHASES:
+        print(f'{phase:>9}: {result["phases"][phase] / games * 1000:.3f} ms per game')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
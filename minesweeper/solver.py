@@ -0,0 +1,429 @@
+"""This module contains a solver that finds the squares of a game that are
+provably safe and the squares that provably hold a bomb, looking only at what
+a player can see: the opened squares and their numbers.
+
+Every opened number next to unknown squares gives a constraint: how many of
+those squares hold a bomb. The constraints are first combined with the
+single-square and the subset/pair rules. When these rules find nothing, the
+constraints are split into independent components, and every component
+small enough is solved exactly by enumerating its bomb placements. The
+results of the enumerations are cached per component, since most components
+do not change from one move to the next.
+"""
+
+from collections import OrderedDict
+
+from engine import STATES
+
+
+class Solver:
+    """A solver that follows one game, move after move.
+
+    Parameters
+    ----------
+    game : Game
+        The game that will be solved
+    maximum_component_size : int
+        Components with more unknown squares than this are not enumerated
+    maximum_cached_components : int
+        The number of component results that are kept
+    """
+
+    def __init__(self, game, maximum_component_size=24, maximum_cached_components=4096):
+        self.game = game
+        self.maximum_component_size = maximum_component_size
+        self.maximum_cached_components = maximum_cached_components
+
+        self.known_mines = set()
+        self.frontier = {}
+        self.stale_squares = set()
+        self.probabilities = {}
+        self.component_cache = OrderedDict()
+
+        opened_squares = []
+        for row in range(game.rows):
+            for column in range(game.columns):
+                if game.get_square_state(row, column) == STATES['unblocked']:
+                    opened_squares.append((row, column))
+        self.observe(opened_squares)
+
+    def observe(self, opened_squares):
+        """Takes the newly opened squares into account. Their constraints and
+        the constraints of the opened numbers around them become stale.
+
+        Parameters
+        ----------
+        opened_squares : list
+            A list of tuples representing coordinates of the squares that
+            were opened since the last call
+        """
+
+        self.stale_squares.update(opened_squares)
+        self.mark_neighbours_stale(opened_squares)
+
+    def mark_neighbours_stale(self, list_of_squares):
+        """Marks the constraints of the frontier squares next to the given
+        squares as stale.
+
+        Parameters
+        ----------
+        list_of_squares : list
+            A list of tuples representing coordinates of squares whose state
+            changed
+        """
+
+        frontier = self.frontier
+        for row, column in list_of_squares:
+            for i in [-1, 0, 1]:
+                for j in [-1, 0, 1]:
+                    if (row + i, column + j) in frontier:
+                        self.stale_squares.add((row + i, column + j))
+
+    def update_frontier(self):
+        """Builds again the constraints of the stale frontier squares.
+        Numbers without unknown neighbours leave the frontier for good.
+
+        Returns
+        ----------
+        set
+            A set of tuples representing coordinates of the frontier squares
+            whose constraints were built again
+        """
+
+        game = self.game
+        updated_squares = set()
+        for square_coords in self.stale_squares:
+            if game.get_square_state(*square_coords) != STATES['unblocked']:
+                continue
+            number = game.get_square_number(*square_coords)
+            if number == 0:
+                continue
+
+            unknown_squares = []
+            for neighbour in game.get_neighbours(square_coords):
+                if neighbour in self.known_mines:
+                    number -= 1
+                elif game.get_square_state(*neighbour) != STATES['unblocked']:
+                    unknown_squares.append(neighbour)
+
+            if unknown_squares:
+                self.frontier[square_coords] = (frozenset(unknown_squares), number)
+                updated_squares.add(square_coords)
+            else:
+                self.frontier.pop(square_coords, None)
+
+        self.stale_squares = set()
+        return updated_squares
+
+    def get_nearby_constraints(self, list_of_squares):
+        """Returns the constraints of the given frontier squares and of the
+        frontier squares close enough to share unknown squares with them.
+
+        Parameters
+        ----------
+        list_of_squares : set
+            A set of tuples representing coordinates of frontier squares
+
+        Returns
+        ----------
+        set
+            A set of tuples, each holding a frozenset of unknown squares and
+            the number of bombs among them
+        """
+
+        frontier = self.frontier
+        constraints = set()
+        for row, column in list_of_squares:
+            for i in range(-2, 3):
+                for j in range(-2, 3):
+                    constraint = frontier.get((row + i, column + j))
+                    if constraint is not None:
+                        constraints.add(constraint)
+        return constraints
+
+    @staticmethod
+    def apply_rules(constraints):
+        """Combines the constraints with the single-square rule (no bombs
+        left, or as many bombs as squares) and the subset/pair rule (if the
+        bombs of one constraint can only fit where it does not overlap
+        another one) until nothing new is found.
+
+        Parameters
+        ----------
+        constraints : set
+            A set of tuples, each holding a frozenset of unknown squares and
+            the number of bombs among them
+
+        Returns
+        ----------
+        tuple
+            A tuple of the set of safe squares, the set of squares holding a
+            bomb and the set of constraints that are left
+        """
+
+        safe_squares = set()
+        mine_squares = set()
+
+        while True:
+            found = False
+            reduced_constraints = set()
+            for squares, number_of_mines in constraints:
+                known_mines = squares & mine_squares
+                squares = squares - known_mines - safe_squares
+                number_of_mines -= len(known_mines)
+                if not squares:
+                    continue
+                if number_of_mines == 0:
+                    safe_squares |= squares
+                    found = True
+                elif number_of_mines == len(squares):
+                    mine_squares |= squares
+                    found = True
+                else:
+                    reduced_constraints.add((squares, number_of_mines))
+
+            constraints = reduced_constraints
+            if found:
+                continue
+
+            constraints_of_square = {}
+            for constraint in constraints:
+                for square_coords in constraint[0]:
+                    constraints_of_square.setdefault(square_coords, []).append(constraint)
+
+            derived_constraints = set()
+            for constraint in constraints:
+                squares, number_of_mines = constraint
+                overlapping = set()
+                for square_coords in squares:
+                    overlapping.update(constraints_of_square[square_coords])
+                overlapping.discard(constraint)
+
+                for other_squares, other_number_of_mines in overlapping:
+                    only_other = other_squares - squares
+                    if other_number_of_mines - number_of_mines == len(only_other):
+                        only_this = squares - other_squares
+                        if only_other or only_this:
+                            mine_squares |= only_other
+                            safe_squares |= only_this
+                            found = True
+                    elif squares < other_squares:
+                        derived_constraints.add((only_other, other_number_of_mines - number_of_mines))
+
+            derived_constraints -= constraints
+            if found:
+                continue
+            if not derived_constraints:
+                return safe_squares, mine_squares, constraints
+            constraints = constraints | derived_constraints
+
+    @staticmethod
+    def split_into_components(constraints):
+        """Groups the constraints that share unknown squares, directly or
+        through other constraints.
+
+        Parameters
+        ----------
+        constraints : set
+            A set of tuples, each holding a frozenset of unknown squares and
+            the number of bombs among them
+
+        Returns
+        ----------
+        list
+            A list of lists of constraints, one list per component
+        """
+
+        parents = {}
+
+        def find(square_coords):
+            root = square_coords
+            while parents[root] != root:
+                root = parents[root]
+            while parents[square_coords] != root:
+                parents[square_coords], square_coords = root, parents[square_coords]
+            return root
+
+        for squares, _ in constraints:
+            for square_coords in squares:
+                parents.setdefault(square_coords, square_coords)
+            squares = iter(squares)
+            first_root = find(next(squares))
+            for square_coords in squares:
+                root = find(square_coords)
+                if root != first_root:
+                    parents[root] = first_root
+
+        components = {}
+        for constraint in constraints:
+            components.setdefault(find(next(iter(constraint[0]))), []).append(constraint)
+        return list(components.values())
+
+    def enumerate_component(self, component):
+        """Counts every placement of bombs that satisfies the constraints of
+        a component, by backtracking over its unknown squares. Results are
+        cached per component.
+
+        Parameters
+        ----------
+        component : list
+            A list of constraints sharing unknown squares
+
+        Returns
+        ----------
+        dict
+            A dict mapping every unknown square of the component to the
+            fraction of the placements in which it holds a bomb
+        """
+
+        key = frozenset(component)
+        probabilities = self.component_cache.get(key)
+        if probabilities is not None:
+            self.component_cache.move_to_end(key)
+            return probabilities
+
+        constraints_of_square = {}
+        for index, (squares, _) in enumerate(component):
+            for square_coords in squares:
+                constraints_of_square.setdefault(square_coords, []).append(index)
+
+        # Squares are assigned in breadth-first order so that constraints are
+        # completed, and wrong branches cut, as early as possible.
+        first_square = next(iter(component[0][0]))
+        ordered_squares = [first_square]
+        seen = {first_square}
+        for square_coords in ordered_squares:
+            for index in constraints_of_square[square_coords]:
+                for other_square in component[index][0]:
+                    if other_square not in seen:
+                        seen.add(other_square)
+                        ordered_squares.append(other_square)
+
+        square_constraints = [constraints_of_square[square_coords] for square_coords in ordered_squares]
+        mines_left = [number_of_mines for _, number_of_mines in component]
+        squares_left = [len(squares) for squares, _ in component]
+        assignment = [0] * len(ordered_squares)
+        mine_counts = [0] * len(ordered_squares)
+        number_of_solutions = 0
+
+        def backtrack(position):
+            nonlocal number_of_solutions
+            if position == len(ordered_squares):
+                number_of_solutions += 1
+                for i, value in enumerate(assignment):
+                    mine_counts[i] += value
+                return
+
+            indexes = square_constraints[position]
+            for value in [0, 1]:
+                if all(0 <= mines_left[index] - value <= squares_left[index] - 1 for index in indexes):
+                    for index in indexes:
+                        mines_left[index] -= value
+                        squares_left[index] -= 1
+                    assignment[position] = value
+                    backtrack(position + 1)
+                    for index in indexes:
+                        mines_left[index] += value
+                        squares_left[index] += 1
+            assignment[position] = 0
+
+        backtrack(0)
+
+        probabilities = {}
+        for square_coords, mine_count in zip(ordered_squares, mine_counts):
+            probabilities[square_coords] = mine_count / number_of_solutions if number_of_solutions else 0.5
+
+        self.component_cache[key] = probabilities
+        if len(self.component_cache) > self.maximum_cached_components:
+            self.component_cache.popitem(last=False)
+        return probabilities
+
+    def get_unknown_squares(self):
+        """Returns the squares that are neither opened nor known to hold a
+        bomb.
+
+        Returns
+        ----------
+        set
+            A set of tuples representing coordinates of squares
+        """
+
+        game = self.game
+        unknown_squares = set()
+        for row in range(game.rows):
+            for column in range(game.columns):
+                if game.get_square_state(row, column) != STATES['unblocked'] and (row, column) not in self.known_mines:
+                    unknown_squares.add((row, column))
+        return unknown_squares
+
+    def solve(self):
+        """Finds the unknown squares that are provably safe and those that
+        provably hold a bomb. The bombs found are remembered for the next
+        moves; the bomb probabilities of the enumerated squares are kept in
+        'probabilities'.
+
+        Returns
+        ----------
+        tuple
+            A tuple of the set of safe squares and the set of squares holding
+            a bomb
+        """
+
+        # The rules are first applied around the constraints that changed
+        # since the last call, since the others were already combined.
+        updated_squares = self.update_frontier()
+        safe_squares, mine_squares, _ = self.apply_rules(self.get_nearby_constraints(updated_squares))
+
+        self.probabilities = {}
+        if not safe_squares and not mine_squares:
+            safe_squares, mine_squares, constraints = self.apply_rules(set(self.frontier.values()))
+
+        if not safe_squares and not mine_squares and len(self.known_mines) == self.game.number_of_bombs:
+            safe_squares = self.get_unknown_squares()
+
+        if not safe_squares and not mine_squares:
+            for component in self.split_into_components(constraints):
+                number_of_squares = len(set().union(*[squares for squares, _ in component]))
+                if number_of_squares > self.maximum_component_size:
+                    continue
+                for square_coords, probability in self.enumerate_component(component).items():
+                    self.probabilities[square_coords] = probability
+                    if probability == 0:
+                        safe_squares.add(square_coords)
+                    elif probability == 1:
+                        mine_squares.add(square_coords)
+
+        self.known_mines |= mine_squares
+        self.mark_neighbours_stale(mine_squares)
+        return safe_squares, mine_squares
+
+
+def play_without_guessing(game, solver=None):
+    """Opens every square the solver proves safe until the game is won or
+    nothing more can be proven. The round must already be started.
+
+    Parameters
+    ----------
+    game : Game
+        A game whose round was started
+    solver : Solver
+        The solver that follows the game; a new one is created if None
+
+    Returns
+    ----------
+    bool
+        True if the game was won without guessing
+    """
+
+    if solver is None:
+        solver = Solver(game)
+
+    while not game.finished:
+        safe_squares, mine_squares = solver.solve()
+        if not safe_squares and not mine_squares:
+            break
+        squares_to_open = [square_coords for square_coords in safe_squares
+                           if game.get_square_state(*square_coords) != STATES['unblocked']]
+        if squares_to_open:
+            solver.observe(game.reveal_squares(squares_to_open))
+    return game.won